@@ -1,19 +1,114 @@
 from loguru_config import logger
 from string import ascii_letters as alpha
+from functools import lru_cache
+from math import log
+from pathlib import Path
 import itertools
 
+from chunked import iter_bounded_map, iter_file_chunks
+
+CIPHER_CHUNK_SIZE = 4 * 1024 * 1024
+CIPHER_SAMPLE_SIZE = 1024 * 1024
+# Частоты строчных букв английского текста, %
+ENGLISH_LETTER_FREQUENCIES = (
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+    6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+)
+# Доля заглавных букв в обычном тексте
+UPPERCASE_SHARE = 0.05
+
+
+def get_shifted_alpha(key: int) -> str:
+    key %= len(alpha)
+    return alpha[key:] + alpha[:key]
+
+
+@lru_cache(maxsize=None)
+def get_translation_table(key: int) -> dict:
+    """Таблица str.translate для сдвига на key. Ключ приводится к остатку
+    от деления на длину алфавита, поэтому в кэше не больше 52 таблиц."""
+    return str.maketrans(alpha, get_shifted_alpha(key))
+
+
+@lru_cache(maxsize=None)
+def get_bytes_translation_table(key: int) -> bytes:
+    """Таблица bytes.translate для сдвига на key. Байты не-ASCII символов
+    UTF-8 не меняются, поэтому текст можно шифровать без декодирования."""
+    return bytes.maketrans(alpha.encode("ascii"), get_shifted_alpha(key).encode("ascii"))
+
+
 def caesar_cipher(data: str, key: int) -> str:
-    result = []
-    alpha_len = len(alpha)
-    remain_key = key % alpha_len
-    for char in data:
-        if char in alpha:
-            pos = alpha.find(char)
-            new_pos = (pos + remain_key) % alpha_len
-            result.append(alpha[new_pos])
-        else:
-            result.append(char)
-    return "".join(result)
+    """Сдвиг латинских букв строки по алфавиту a-zA-Z на key позиций.
+    Для расшифровки передаётся -key."""
+    return data.translate(get_translation_table(key % len(alpha)))
+
+
+def caesar_cipher_bytes(data: bytes, key: int) -> bytes:
+    return data.translate(get_bytes_translation_table(key % len(alpha)))
+
+
+def caesar_cipher_file(
+    source: Path, target: Path, key: int, chunk_size: int = CIPHER_CHUNK_SIZE, workers: int = 0
+):
+    """Шифрование файла source в target блоками по chunk_size байт.
+    Для расшифровки передаётся -key.
+
+    Сдвиг меняет каждый байт независимо от соседних, поэтому блоки не
+    нужно выравнивать по границам символов UTF-8. При workers больше нуля
+    блоки шифруются на пуле процессов (в работе одновременно не больше
+    двух блоков на процесс) и записываются в исходном порядке. Таблица
+    bytes.translate обрабатывает блок быстрее, чем он передаётся между
+    процессами, поэтому пул имеет смысл только при медленном одном ядре.
+    """
+    with open(target, "wb") as output:
+        blocks = iter_file_chunks(source, chunk_size)
+        for block in iter_bounded_map(caesar_cipher_bytes, blocks, key, workers=workers):
+            output.write(block)
+
+
+def get_letter_counts(data: str | bytes) -> list:
+    """Количество каждой буквы алфавита alpha в тексте"""
+    letters = alpha.encode("ascii") if isinstance(data, (bytes, bytearray)) else alpha
+    return [data.count(letters[i:i + 1]) for i in range(len(letters))]
+
+
+def rank_caesar_keys(letter_counts: list) -> list:
+    """Оценка всех сдвигов по гистограмме букв шифротекста.
+
+    Для каждого сдвига key считается логарифм правдоподобия расшифровки:
+    буква шифротекста с номером i после расшифровки становится буквой
+    (i - key) % 52, вероятность которой берётся из частот английского
+    текста с долей заглавных UPPERCASE_SHARE. Текст не расшифровывается,
+    гистограмма строится один раз.
+
+    Возвращает список (оценка, key) по убыванию оценки. Текст только из
+    заглавных букв будет определён со сдвигом, отличающимся на 26.
+    """
+    total = sum(ENGLISH_LETTER_FREQUENCIES)
+    expected = [
+        log(frequency / total * share)
+        for share in (1 - UPPERCASE_SHARE, UPPERCASE_SHARE)
+        for frequency in ENGLISH_LETTER_FREQUENCIES
+    ]
+    size = len(alpha)
+    scores = [
+        (sum(count * expected[(i - key) % size] for i, count in enumerate(letter_counts) if count), key)
+        for key in range(size)
+    ]
+    return sorted(scores, reverse=True)
+
+
+def crack_caesar(data: str | bytes) -> int:
+    """Наиболее вероятный ключ, которым зашифрован английский текст:
+    caesar_cipher(data, -key) даёт исходный текст"""
+    return rank_caesar_keys(get_letter_counts(data))[0][1]
+
+
+def crack_caesar_file(file: Path, sample_size: int = CIPHER_SAMPLE_SIZE) -> int:
+    """Ключ шифрования файла по гистограмме первых sample_size байт:
+    для частотного анализа начала большого файла достаточно"""
+    with open(file, "rb") as f:
+        return crack_caesar(f.read(sample_size))
 
 
 def caesar_cipher_test():
@@ -35,6 +130,11 @@ def caesar_cipher_test():
         caesar_cipher("Text with 123 & symbols!", 4)
     )  # Ожидается: Xibx amxl 123 & wcqfsppw!
 
+    # Подбор ключа частотным анализом
+    logger.info(
+        crack_caesar(caesar_cipher("It was the best of times, it was the worst of times", 7))
+    )  # Ожидается: 7
+
 def demo_takewhile():
     arr = [3, 5, 7, -2, 6]
     logger.info(sum([n for n in itertools.takewhile(lambda x: x >= 0, arr)]))
@@ -0,0 +1,60 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import os
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_file_chunks(file: Path, chunk_size: int = CHUNK_SIZE, reuse_buffer: bool = False):
+    """Чтение двоичного файла блоками по chunk_size байт.
+
+    При reuse_buffer все блоки читаются в один буфер и выдаются как
+    memoryview без копирования, поэтому блок нужно обработать до чтения
+    следующего. Иначе каждый блок - отдельный объект bytes, который можно
+    сохранить или передать другому процессу.
+    """
+    with open(file, "rb") as f:
+        if not reuse_buffer:
+            while chunk := f.read(chunk_size):
+                yield chunk
+            return
+        view = memoryview(bytearray(chunk_size))
+        while read := f.readinto(view):
+            yield view[:read]
+
+
+def iter_text_chunks(file: Path, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8"):
+    """Чтение текстового файла блоками по chunk_size символов. Переводы
+    строк возвращаются как есть."""
+    with open(file, encoding=encoding, newline="") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def iter_bounded_map(function, items, *args, workers: int | None = 0):
+    """Результаты function(item, *args) для каждого элемента items
+    в исходном порядке.
+
+    При workers равном нулю элементы обрабатываются в текущем процессе,
+    иначе на пуле из workers процессов (None - по числу процессоров).
+    В отличие от Executor.map, items не перебираются целиком заранее:
+    в работе одновременно не больше двух элементов на процесс, поэтому
+    память не зависит от числа элементов. function и элементы должны
+    передаваться между процессами через pickle.
+    """
+    if workers is not None and workers <= 0:
+        for item in items:
+            yield function(item, *args)
+        return
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item, *args))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,8 +1,113 @@
+from collections import Counter
+from itertools import chain
+from math import ceil
+from pathlib import Path
+
+import sys
+
+from chunked import iter_bounded_map, iter_text_chunks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HISTOGRAM_CHUNK_SIZE = 4 * 1024 * 1024
+HISTOGRAM_HEIGHT = 20
+HISTOGRAM_WIDTH = 60
+BAR = "|"
+HORIZONTAL_BAR = "="
+
+
+def count_chars(data: str) -> Counter:
+    """Количество каждого символа строки. С NumPy строка перекодируется
+    в UTF-32, и коды символов считаются одним вызовом np.unique, без NumPy
+    символы считает Counter."""
+    if np is None or not data:
+        return Counter(data)
+    codes, counts = np.unique(
+        np.frombuffer(data.encode("utf-32-le"), dtype=np.uint32), return_counts=True
+    )
+    return Counter(dict(zip(map(chr, codes.tolist()), counts.tolist())))
+
+
+def count_file_chars(
+    file: Path,
+    chunk_size: int = HISTOGRAM_CHUNK_SIZE,
+    workers: int = 0,
+    encoding: str = "utf-8",
+) -> Counter:
+    """Количество каждого символа текстового файла.
+
+    Файл читается блоками, поэтому память не зависит от размера файла.
+    При workers больше нуля блоки считаются параллельно на пуле процессов
+    (в работе одновременно не больше двух блоков на процесс), а счётчики
+    блоков складываются в конце.
+    """
+    counter = Counter()
+    chunks = iter_text_chunks(file, chunk_size, encoding)
+    for chunk_counter in iter_bounded_map(count_chars, chunks, workers=workers):
+        counter.update(chunk_counter)
+    return counter
+
+
+def scale_counts(counts: list, size: int | None) -> list:
+    """Длины столбцов: количества, пропорционально уменьшенные так, чтобы
+    самый длинный столбец был не длиннее size. Ненулевое количество
+    даёт столбец хотя бы из одного символа."""
+    max_count = max(counts, default=0)
+    if size is None or max_count <= size:
+        return list(counts)
+    return [ceil(count * size / max_count) for count in counts]
+
+
+def get_char_label(char: str) -> str:
+    return char if char.isprintable() else char.encode("unicode_escape").decode("ascii")
+
+
+def render_histogram(
+    counter: dict, height: int | None = HISTOGRAM_HEIGHT, horizontal: bool = False,
+    width: int = HISTOGRAM_WIDTH,
+) -> str:
+    """Гистограмма символов по их количеству.
+
+    Аргументы:
+    counter: словарь символ -> количество,
+    height: наибольшая высота вертикальных столбцов в строках, None - без
+    масштабирования (высота равна количеству),
+    horizontal: горизонтальные столбцы, по строке на символ, с количеством
+    в конце строки,
+    width: наибольшая длина горизонтальных столбцов.
+
+    Символы идут по возрастанию. Непечатаемые символы в масштабированной
+    вертикальной гистограмме заменяются на "?", без масштабирования
+    выводятся как есть, в горизонтальной - экранированными. Результат
+    собирается одним join.
+    """
+    chars = sorted(counter)
+    counts = [counter[char] for char in chars]
+    if horizontal:
+        labels = [get_char_label(char) for char in chars]
+        label_width = max(map(len, labels), default=0)
+        bars = scale_counts(counts, width)
+        return "\n".join(
+            f"{label:<{label_width}} {HORIZONTAL_BAR * bar} {count}"
+            for label, bar, count in zip(labels, bars, counts)
+        )
+    bars = scale_counts(counts, height)
+    rows = [
+        "".join(BAR if bar >= level else " " for bar in bars)
+        for level in range(max(bars, default=0), 0, -1)
+    ]
+    rows.append("".join(
+        char if height is None or char.isprintable() else "?" for char in chars
+    ))
+    return "\n".join(rows)
+
+
 def print_histogram(data: list) -> str:
-    result = ""
-    for i in reversed(data):
-        result += "".join(i)
-    return result
+    return "".join(chain.from_iterable(reversed(data)))
 
 def get_histogram(input_chars: list, dict_chars: dict) -> list:
     result = [input_chars]
@@ -17,9 +122,8 @@ def get_histogram(input_chars: list, dict_chars: dict) -> list:
 
 
 def fulfill_dict_chars(input_data: str, dict_data: dict):
-    for i in input_data:
-        val = dict_data.get(i, 0)
-        dict_data[i] = val + 1
+    for char, count in count_chars(input_data).items():
+        dict_data[char] = dict_data.get(char, 0) + count
 
 
 def histogram(data: str) -> str:
@@ -28,15 +132,12 @@ def histogram(data: str) -> str:
     if not input_data:
         print("Ошибка: строка не может быть пустой")
         return
-    dict_chars = dict.fromkeys(input_data, 0)
-    list_chars = list(dict_chars.keys())
-    list_chars.sort()
-    fulfill_dict_chars(input_data, dict_chars)
-    histogram = get_histogram(list_chars, dict_chars)
-    str_histogram = print_histogram(histogram)
-    return str_histogram
+    return render_histogram(count_chars(input_data), height=None)
 
 
 if __name__ == "__main__":
-    print(histogram("abcde"))
-    print(histogram("aaaaaa"))
+    if len(sys.argv) > 1:
+        print(render_histogram(count_file_chars(Path(sys.argv[1])), horizontal=True))
+    else:
+        print(histogram("abcde"))
+        print(histogram("aaaaaa"))
@@ -1,47 +1,413 @@
+from concurrent.futures import ProcessPoolExecutor
 from math import ceil
-from itertools import groupby
-from string import digits
+from itertools import groupby, islice
+from operator import index
+from pathlib import Path
+from string import ascii_lowercase, digits
+from time import perf_counter
+
+import re
+import warnings
+
+from chunked import iter_bounded_map, iter_file_chunks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+ROMAN_MAX = 3999
+ROMAN_DIGITS = (
+    ("M", 1000), ("CM", 900), ("D", 500), ("CD", 400), ("C", 100), ("XC", 90),
+    ("L", 50), ("XL", 40), ("X", 10), ("IX", 9), ("V", 5), ("IV", 4), ("I", 1),
+)
+
+
+def build_roman(arabic_number: int) -> str:
+    """Римская запись числа по таблице ROMAN_DIGITS"""
+    parts = []
+    for key, value in ROMAN_DIGITS:
+        int_part, arabic_number = divmod(arabic_number, value)
+        parts.append(key * int_part)
+    return "".join(parts)
+
+
+# Таблицы для чисел 1..ROMAN_MAX: индекс - арабское число, значение - римское,
+# и обратная. Неканонические записи вроде "IIII" в обратную таблицу не входят.
+ARABIC_TO_ROMAN = ("",) + tuple(build_roman(n) for n in range(1, ROMAN_MAX + 1))
+ROMAN_TO_ARABIC = {roman: n for n, roman in enumerate(ARABIC_TO_ROMAN) if n}
+if np is not None:
+    ROMAN_ARRAY = np.array(ARABIC_TO_ROMAN)
+    SORTED_ROMAN_ARRAY = np.array(sorted(ROMAN_TO_ARABIC))
+    SORTED_ARABIC_ARRAY = np.array(
+        [ROMAN_TO_ARABIC[roman] for roman in SORTED_ROMAN_ARRAY], dtype=np.int64
+    )
+
+
+def is_numpy_array(data) -> bool:
+    return np is not None and isinstance(data, np.ndarray)
 
 
 class RomanArabicConverter:
+    """Преобразование чисел от 1 до ROMAN_MAX между римской и арабской
+    записью по заранее построенным таблицам.
+
+    Одиночные методы проверяют ввод и выбрасывают ValueError. Пакетные
+    методы принимают перебираемые значения или массивы NumPy и вместо
+    исключений возвращают маску ошибок: (результаты, ошибки), где ошибкам
+    соответствуют 0 или пустая строка в результатах.
+    """
+
     @staticmethod
     def roman_to_arabic(roman_number: str) -> int:
         """Преобразует римское число в арабское"""
-        roman_map = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100, "D": 500, "M": 1000}
-
-        prev_num = roman_map.get(roman_number[0])
-        result = prev_num
-        data = roman_number[1:]
-        for s in data:
-            current_num = roman_map.get(s)
-            result += current_num
-            if current_num > prev_num:
-                result -= 2 * prev_num
-            prev_num = current_num
-
-        return result
+        try:
+            return ROMAN_TO_ARABIC[roman_number]
+        except (KeyError, TypeError):
+            raise ValueError(f"Некорректное римское число: {roman_number!r}") from None
 
     @staticmethod
     def arabic_to_roman(arabic_number: int) -> str:
         """Преобразует арабское число в римское."""
-        result = ""
-        arabic_map = {"M": 1000, "CM": 900, "D": 500, "CD": 400, "C": 100, "XC": 90,
-                      "L": 50, "XL": 40, "X": 10, "IX": 9, "V": 5, "IV": 4, "I": 1}
-        remain_part = arabic_number
+        try:
+            number = index(arabic_number)
+        except TypeError:
+            number = 0
+        if isinstance(arabic_number, bool) or not 1 <= number <= ROMAN_MAX:
+            raise ValueError(
+                f"Число {arabic_number!r} нельзя записать римскими цифрами, "
+                f"допустимы целые числа от 1 до {ROMAN_MAX}"
+            )
+        return ARABIC_TO_ROMAN[number]
 
-        for key, value in arabic_map.items():
-            int_part = remain_part // value
-            if int_part > 0:
-                result += key * int_part
-                remain_part -= value * int_part
+    @staticmethod
+    def roman_to_arabic_batch(roman_numbers) -> tuple:
+        """Пакетное преобразование римских чисел в арабские.
+        Для массива NumPy возвращает массивы значений (int64) и ошибок (bool),
+        иначе - списки."""
+        if is_numpy_array(roman_numbers):
+            romans = roman_numbers.astype(str)
+            positions = np.searchsorted(SORTED_ROMAN_ARRAY, romans)
+            positions = np.minimum(positions, len(SORTED_ROMAN_ARRAY) - 1)
+            valid = SORTED_ROMAN_ARRAY[positions] == romans
+            return np.where(valid, SORTED_ARABIC_ARRAY[positions], 0), ~valid
+        values = []
+        errors = []
+        for roman_number in roman_numbers:
+            try:
+                value = ROMAN_TO_ARABIC.get(roman_number, 0)
+            except TypeError:
+                value = 0
+            values.append(value)
+            errors.append(not value)
+        return values, errors
 
-        return result
+    @staticmethod
+    def arabic_to_roman_batch(arabic_numbers) -> tuple:
+        """Пакетное преобразование арабских чисел в римские.
+        Для целочисленного массива NumPy возвращает массивы строк и ошибок
+        (bool), иначе - списки."""
+        if is_numpy_array(arabic_numbers) and np.issubdtype(arabic_numbers.dtype, np.integer):
+            valid = (arabic_numbers >= 1) & (arabic_numbers <= ROMAN_MAX)
+            return ROMAN_ARRAY[np.where(valid, arabic_numbers, 0)], ~valid
+        romans = []
+        errors = []
+        for arabic_number in arabic_numbers:
+            try:
+                romans.append(RomanArabicConverter.arabic_to_roman(arabic_number))
+                errors.append(False)
+            except ValueError:
+                romans.append("")
+                errors.append(True)
+        return romans, errors
+
+
+RLE_CHUNK_SIZE = 1024 * 1024
+RLE_ESCAPE = "\\"
+RLE_TEXT_RUN_RE = re.compile(r"(.)\1*", re.DOTALL)
+RLE_BYTES_RUN_RE = re.compile(rb"(.)\1*", re.DOTALL)
+# Наибольший кусок, которым декодер выдаёт длинную серию
+RLE_MAX_PIECE = 1024 * 1024
 
 
 def chunks_amount(file_size: int, chunk_size: int = 1024) -> tuple:
     return (file_size // chunk_size, file_size % chunk_size)
 
 
+def encode_varint(value: int) -> bytes:
+    """Беззнаковое целое в формате LEB128: по 7 бит в байте, старший бит
+    означает продолжение числа"""
+    result = bytearray()
+    while value >= 0x80:
+        result.append(value & 0x7F | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+class RLEEncoder:
+    """Потоковый кодер RLE. Данные подаются блоками методом encode,
+    незавершённая последняя серия блока переносится в следующий блок,
+    поэтому результат не зависит от разбиения данных на блоки.
+
+    Форматы:
+    байты - байт значения и длина серии в LEB128 (см. encode_varint);
+    текст - символ и длина серии десятичными цифрами, цифры и RLE_ESCAPE
+    в данных предваряются RLE_ESCAPE. Для текста без цифр формат
+    совпадает с RLEAmateur.rle_compression: "abbccc" -> "a1b2c3".
+    """
+
+    binary: bool
+    value: str | int | None
+    count: int
+
+    def __init__(self, binary: bool = True):
+        self.binary = binary
+        self.value = None
+        self.count = 0
+
+    def encode_run(self, value, count: int):
+        if self.binary:
+            return bytes((value,)) + encode_varint(count)
+        if value in digits or value == RLE_ESCAPE:
+            value = RLE_ESCAPE + value
+        return f"{value}{count}"
+
+    def encode(self, chunk) -> bytes | str:
+        """Кодирование очередного блока: bytes, bytearray или memoryview
+        для двоичного формата, str для текстового"""
+        pattern = RLE_BYTES_RUN_RE if self.binary else RLE_TEXT_RUN_RE
+        parts = []
+        for match in pattern.finditer(chunk):
+            value = chunk[match.start()]
+            count = match.end() - match.start()
+            if value == self.value:
+                self.count += count
+                continue
+            if self.value is not None:
+                parts.append(self.encode_run(self.value, self.count))
+            self.value = value
+            self.count = count
+        return (b"" if self.binary else "").join(parts)
+
+    def flush(self) -> bytes | str:
+        """Кодирование перенесённой последней серии в конце данных"""
+        if self.value is None:
+            return b"" if self.binary else ""
+        result = self.encode_run(self.value, self.count)
+        self.value = None
+        self.count = 0
+        return result
+
+
+class RLEDecoder:
+    """Потоковый декодер формата RLEEncoder. Запись серии может
+    разорваться на границе блоков, её начало сохраняется до следующего
+    блока. Длинные серии выдаются кусками не больше RLE_MAX_PIECE."""
+
+    binary: bool
+    value: str | int | None
+    count: int
+
+    def __init__(self, binary: bool = True):
+        self.binary = binary
+        self.value = None
+        self.count = 0
+        self.shift = 0
+        self.digits = ""
+        self.is_escaped = False
+
+    def iter_run(self, value, count: int):
+        piece = bytes((value,)) if self.binary else value
+        while count > 0:
+            size = min(count, RLE_MAX_PIECE)
+            yield piece * size
+            count -= size
+
+    def iter_decode(self, chunk):
+        """Декодирование очередного блока по кускам"""
+        if self.binary:
+            yield from self.iter_decode_bytes(chunk)
+        else:
+            yield from self.iter_decode_text(chunk)
+
+    def iter_decode_bytes(self, chunk):
+        for byte in memoryview(chunk).cast("B"):
+            if self.value is None:
+                self.value = byte
+                self.count = self.shift = 0
+                continue
+            self.count |= (byte & 0x7F) << self.shift
+            self.shift += 7
+            if byte < 0x80:
+                yield from self.iter_run(self.value, self.count)
+                self.value = None
+
+    def iter_decode_text(self, chunk: str):
+        for char in chunk:
+            if self.is_escaped:
+                self.value = char
+                self.is_escaped = False
+            elif char in digits:
+                if self.value is None:
+                    raise ValueError(f"Неэкранированная цифра {char!r} вне серии")
+                self.digits += char
+            else:
+                yield from self.iter_pending_run()
+                if char == RLE_ESCAPE:
+                    self.is_escaped = True
+                else:
+                    self.value = char
+
+    def iter_pending_run(self):
+        if self.value is None:
+            return
+        if not self.digits:
+            raise ValueError(f"Нет длины серии для символа {self.value!r}")
+        value, count = self.value, int(self.digits)
+        self.value = None
+        self.digits = ""
+        yield from self.iter_run(value, count)
+
+    def decode(self, chunk) -> bytes | str:
+        return (b"" if self.binary else "").join(self.iter_decode(chunk))
+
+    def flush(self) -> bytes | str:
+        """Завершение декодирования: выдаёт последнюю серию текста
+        и проверяет, что данные не оборваны внутри записи серии"""
+        if self.is_escaped or (self.binary and self.value is not None):
+            raise ValueError("Сжатые данные оборваны")
+        if self.binary:
+            return b""
+        return "".join(self.iter_pending_run())
+
+
+def rle_encode(data: bytes | bytearray | memoryview | str) -> bytes | str:
+    """Сжатие RLE: байты в двоичном формате, строка в текстовом"""
+    encoder = RLEEncoder(binary=not isinstance(data, str))
+    return encoder.encode(data) + encoder.flush()
+
+
+def rle_decode(data: bytes | bytearray | memoryview | str) -> bytes | str:
+    """Восстановление данных, сжатых функцией rle_encode"""
+    decoder = RLEDecoder(binary=not isinstance(data, str))
+    return decoder.decode(data) + decoder.flush()
+
+
+def rle_encode_file(source: Path, target: Path, chunk_size: int = RLE_CHUNK_SIZE):
+    """Потоковое сжатие файла в двоичном формате RLE. Файл любого размера
+    читается блоками по chunk_size байт, расход памяти не зависит
+    от размера файла."""
+    encoder = RLEEncoder()
+    with target.open("wb") as f:
+        for chunk in iter_file_chunks(source, chunk_size, reuse_buffer=True):
+            f.write(encoder.encode(chunk))
+        f.write(encoder.flush())
+
+
+def rle_decode_file(source: Path, target: Path, chunk_size: int = RLE_CHUNK_SIZE):
+    """Потоковое восстановление файла, сжатого функцией rle_encode_file"""
+    decoder = RLEDecoder()
+    with target.open("wb") as f:
+        for chunk in iter_file_chunks(source, chunk_size, reuse_buffer=True):
+            for piece in decoder.iter_decode(chunk):
+                f.write(piece)
+        decoder.flush()
+
+
+ARRAY_RLE_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Для работы с массивами нужен пакет numpy")
+
+
+def get_run_starts(array) -> "np.ndarray":
+    """Индексы начал серий одинаковых значений одномерного массива.
+    Значения NaN считаются равными друг другу."""
+    changed = array[1:] != array[:-1]
+    if np.issubdtype(array.dtype, np.floating):
+        changed &= ~(np.isnan(array[1:]) & np.isnan(array[:-1]))
+    return np.flatnonzero(np.concatenate(([True], changed)))
+
+
+def rle_encode_chunk(array) -> tuple:
+    """Сжатие RLE одного одномерного массива без деления на части"""
+    if array.size == 0:
+        return array[:0].copy(), np.zeros(0, dtype=np.int64)
+    starts = get_run_starts(array)
+    lengths = np.diff(np.append(starts, array.size))
+    return array[starts], lengths
+
+
+def rle_encode_array(data, workers: int = 0, chunk_size: int = ARRAY_RLE_CHUNK_SIZE) -> tuple:
+    """Сжатие RLE массива NumPy (многомерный массив сжимается в порядке
+    ravel). Границы серий находятся одним векторным сравнением соседних
+    элементов, без цикла по элементам.
+
+    Аргументы:
+    data: массив или последовательность чисел,
+    workers: число процессов. Если больше нуля, массив длиннее chunk_size
+    делится на части по chunk_size элементов, части сжимаются параллельно,
+    а серии на границах частей склеиваются,
+    chunk_size: размер части массива.
+
+    Возвращает два массива: значения серий и их длины (int64).
+    """
+    require_numpy()
+    array = np.asarray(data).ravel()
+    if workers <= 0 or array.size <= chunk_size:
+        return rle_encode_chunk(array)
+    chunks = [array[i:i + chunk_size] for i in range(0, array.size, chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        encoded = list(executor.map(rle_encode_chunk, chunks))
+    values = np.concatenate([chunk_values for chunk_values, _ in encoded])
+    lengths = np.concatenate([chunk_lengths for _, chunk_lengths in encoded])
+    # Серии соседних частей с одинаковым значением объединяются
+    starts = get_run_starts(values)
+    return values[starts], np.add.reduceat(lengths, starts)
+
+
+def rle_decode_array(values, lengths) -> "np.ndarray":
+    """Восстановление массива, сжатого rle_encode_array, одним np.repeat"""
+    require_numpy()
+    return np.repeat(np.asarray(values), np.asarray(lengths))
+
+
+def rle_benchmark(size: int = 1_000_000, mean_run: int = 8, seed: int = 1) -> dict:
+    """Сравнение rle_encode_array с RLEAmateur.rle_compression на одних
+    данных: size букв, длины серий случайны со средним mean_run.
+    Возвращает время в секундах и число серий."""
+    require_numpy()
+    rng = np.random.default_rng(seed)
+    run_values = rng.integers(0, len(ascii_lowercase), size=size // mean_run + 1)
+    run_lengths = rng.integers(1, 2 * mean_run, size=run_values.size)
+    letters = np.frombuffer(ascii_lowercase.encode("ascii"), dtype=np.uint8)
+    array = np.repeat(letters[run_values], run_lengths)[:size]
+    text = array.tobytes().decode("ascii")
+
+    started = perf_counter()
+    compressed = RLEAmateur.rle_compression(text)
+    amateur_time = perf_counter() - started
+
+    started = perf_counter()
+    values, lengths = rle_encode_array(array)
+    numpy_time = perf_counter() - started
+
+    assert compressed == "".join(
+        f"{chr(value)}{length}" for value, length in zip(values.tolist(), lengths.tolist())
+    )
+    return {
+        "size": size,
+        "runs": int(values.size),
+        "rle_compression_s": amateur_time,
+        "rle_encode_array_s": numpy_time,
+        "speedup": amateur_time / numpy_time if numpy_time else None,
+    }
+
+
 class RLEAmateur:
     @staticmethod
     def rle_compression(data: str) -> str:
@@ -51,31 +417,375 @@ class RLEAmateur:
 
     @staticmethod
     def rle_uncompression(compression_data: str) -> str:
-        """Восстанавливает строку из сжатого представления RLE."""
-        list_data = list(compression_data)
-        for i, char in enumerate(list_data):
-            if char in digits:
-                alpha = list_data[i - 1]
-                list_data[i] = alpha * (int(char) - 1)
-        return "".join(list_data)
+        """Восстанавливает строку из сжатого представления RLE.
+        Длина серии может состоять из нескольких цифр: "a12" -> 12 символов
+        "a". Строки с цифрами этот формат не различает, для них есть
+        rle_encode и rle_decode."""
+        return "".join(
+            char * int(count)
+            for char, count in re.findall(r"([^0-9])([0-9]+)", compression_data, re.DOTALL)
+        )
+
+
+STATS_CHUNK_SIZE = 1024 * 1024
+WHITESPACE = " \t\n\r\f\v"
+
+
+class NumberStats:
+    """Потоковая статистика по числам: количество, сумма, среднее,
+    минимум, максимум и дисперсия за один проход.
+
+    Числа добавляются пачками. Для пачки среднее и сумма квадратов
+    отклонений считаются отдельно, а затем объединяются с накопленными
+    по формуле Уэлфорда для объединения выборок, поэтому дисперсия не
+    теряет точность на больших значениях, а память не зависит от
+    количества чисел.
+    """
+
+    count: int
+    total: int | float
+    mean: float
+    m2: float
+    minimum: float | None
+    maximum: float | None
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def merge(self, count: int, total: float, m2: float, minimum: float, maximum: float):
+        """Добавление пачки из count чисел с суммой total, суммой квадратов
+        отклонений от среднего m2 и крайними значениями minimum, maximum"""
+        if not count:
+            return
+        mean = total / count
+        new_count = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / new_count
+        self.m2 += m2 + delta * delta * self.count * count / new_count
+        self.count = new_count
+        self.total += total
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def add_values(self, values):
+        """Добавление пачки чисел: массива NumPy или последовательности"""
+        self.merge(*get_values_stats(values))
+
+    def get_mean(self, round_up: bool = False) -> float | int:
+        """Среднее значение. При round_up результат округляется вверх до
+        целого по сумме чисел, как в arithmetical_mean."""
+        if not self.count:
+            raise ValueError("Нет чисел для подсчёта среднего")
+        if not round_up:
+            return self.mean
+        if isinstance(self.total, int):
+            # Точное деление целых с округлением вверх
+            return -(-self.total // self.count)
+        return ceil(self.total / self.count)
+
+    def get_variance(self, ddof: int = 0) -> float:
+        """Дисперсия: ddof=0 - генеральная, ddof=1 - выборочная"""
+        if self.count <= ddof:
+            raise ValueError("Недостаточно чисел для подсчёта дисперсии")
+        return self.m2 / (self.count - ddof)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean if self.count else None,
+            "min": self.minimum,
+            "max": self.maximum,
+            "variance": self.m2 / self.count if self.count else None,
+        }
+
+
+def iter_number_blocks(chunks):
+    """Склейка блоков текста (str или bytes) в блоки, которые кончаются
+    на границе чисел: хвост блока после последнего пробельного символа
+    переносится в начало следующего блока"""
+    tail = None
+    for chunk in chunks:
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tobytes()
+        data = chunk if tail is None else tail + chunk
+        whitespace = WHITESPACE.encode("ascii") if isinstance(data, bytes) else WHITESPACE
+        cut = max(data.rfind(char) for char in whitespace)
+        tail = data[cut + 1:]
+        if cut >= 0:
+            yield data[:cut + 1]
+    if tail:
+        yield tail
+
+
+def parse_numbers(block: str | bytes, integer: bool = False) -> "list | np.ndarray":
+    """Числа из блока текста, разделённые пробельными символами. С NumPy
+    блок разбирается целиком функцией np.fromstring, без NumPy -
+    через split. При нечисловом значении выбрасывается ValueError.
+
+    При integer допускаются только целые числа. Они разбираются в int64,
+    а если в блоке есть числа за пределами int64, которые np.fromstring
+    молча ограничивает, - в целые Python.
+    """
+    if np is None:
+        return [int(token) if integer else float(token) for token in block.split()]
+    with warnings.catch_warnings():
+        # Без этого np.fromstring на нечисловом значении только предупреждает
+        # и возвращает числа до него
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(block, dtype=np.int64 if integer else np.float64, sep=" ")
+        except DeprecationWarning as error:
+            raise ValueError(str(error)) from None
+    if integer and values.size:
+        limits = np.iinfo(np.int64)
+        if values.max() == limits.max or values.min() == limits.min:
+            return [int(token) for token in block.split()]
+    return values
+
+
+def get_values_stats(values) -> tuple:
+    """Количество, сумма, сумма квадратов отклонений от среднего, минимум
+    и максимум пачки чисел - аргументы NumberStats.merge. Сумма целых
+    чисел считается точно, в целых Python."""
+    if is_numpy_array(values):
+        if not values.size:
+            return 0, 0, 0.0, None, None
+        minimum, maximum = values.min().item(), values.max().item()
+        if values.dtype.kind != "i":
+            total = float(values.sum())
+        elif max(maximum, -minimum) * values.size < 2 ** 63:
+            # Сумма int64 не переполнится
+            total = int(values.sum())
+        else:
+            total = sum(values.tolist())
+        m2 = float(np.square(values.astype(np.float64) - total / values.size).sum())
+        return values.size, total, m2, minimum, maximum
+    if not values:
+        return 0, 0, 0.0, None, None
+    total = sum(values)
+    mean = total / len(values)
+    m2 = sum((value - mean) ** 2 for value in values)
+    return len(values), total, m2, min(values), max(values)
+
+
+def get_block_stats(block: str | bytes, integer: bool = False) -> tuple:
+    return get_values_stats(parse_numbers(block, integer))
+
+
+def aggregate_numbers(
+    source, chunk_size: int = STATS_CHUNK_SIZE, workers: int = 0, integer: bool = False
+) -> NumberStats:
+    """Статистика по числам, разделённым пробельными символами.
+
+    Аргументы:
+    source: путь к файлу (Path), строка или bytes с числами или
+    перебираемые блоки текста (str или bytes), например открытый файл,
+    chunk_size: размер блока чтения файла,
+    workers: число процессов. Разбор чисел упирается в процессор, поэтому
+    при workers больше нуля блоки разбираются параллельно, в работе
+    одновременно не больше двух блоков на процесс,
+    integer: допускаются только целые числа, их сумма считается точно.
+
+    Файл читается блоками без загрузки целиком, поэтому память не зависит
+    от размера файла. Без integer числа разбираются как float64. Среднее
+    и дисперсия всегда считаются в float.
+    """
+    if isinstance(source, Path):
+        chunks = iter_file_chunks(source, chunk_size)
+    elif isinstance(source, (str, bytes, bytearray, memoryview)):
+        chunks = [bytes(source) if not isinstance(source, str) else source]
+    else:
+        chunks = source
+    stats = NumberStats()
+    blocks = iter_number_blocks(chunks)
+    for block_stats in iter_bounded_map(get_block_stats, blocks, integer, workers=workers):
+        stats.merge(*block_stats)
+    return stats
 
 
 def arithmetical_mean(a: str) -> int:
-    result = 0
-    values = a.split(" ")
-    for v in values:
-        result += int(v)
-    return ceil(result / len(values))
+    """Среднее чисел строки, округлённое вверх до целого"""
+    return aggregate_numbers(a, integer=True).get_mean(round_up=True)
 
 
 def number_reverse(data: int) -> int:
     return int(str(data)[::-1])
 
 
-def is_palindrome(data: str) -> bool:
-    data = data.lower().replace(" ", "")
-    rev_data = data[::-1]
-    return data == rev_data
+def number_reverse_arithmetic(data: int) -> int:
+    """Число с цифрами в обратном порядке без преобразования в строку.
+    Знак сохраняется: -123 -> -321."""
+    sign = -1 if data < 0 else 1
+    data = abs(data)
+    result = 0
+    while data:
+        data, digit = divmod(data, 10)
+        result = result * 10 + digit
+    return sign * result
+
+
+def number_reverse_batch(numbers) -> "list | np.ndarray":
+    """Разворот цифр для набора целых чисел.
+
+    Для массива NumPy цифры снимаются со всех элементов сразу: на каждом
+    шаге выполняется одно векторное деление с остатком, число шагов равно
+    числу цифр самого длинного числа. Результат развёрнутого числа должен
+    помещаться в тип массива. Для остальных перебираемых значений
+    возвращается список результатов number_reverse_arithmetic.
+    """
+    if not is_numpy_array(numbers):
+        return [number_reverse_arithmetic(number) for number in numbers]
+    remaining = np.abs(numbers)
+    result = np.zeros_like(remaining)
+    while remaining.any():
+        has_digits = remaining > 0
+        remaining, digit = np.divmod(remaining, 10)
+        result = np.where(has_digits, result * 10 + digit, result)
+    return np.sign(numbers) * result
+
+
+PALINDROME_MIN_LENGTH = 3
+PALINDROME_BATCH_LINES = 1000
+
+
+def is_palindrome(data: str, ignore_punctuation: bool = False) -> bool:
+    """Проверка строки на палиндром без копирования: два индекса идут
+    навстречу друг другу от концов строки. Пробельные символы (а при
+    ignore_punctuation - все символы, кроме букв и цифр) пропускаются,
+    символы сравниваются без учёта регистра через casefold."""
+    left, right = 0, len(data) - 1
+    skip = (lambda char: not char.isalnum()) if ignore_punctuation else str.isspace
+    while left < right:
+        if skip(data[left]):
+            left += 1
+        elif skip(data[right]):
+            right -= 1
+        elif data[left].casefold() != data[right].casefold():
+            return False
+        else:
+            left += 1
+            right -= 1
+    return True
+
+
+def get_palindrome_keys(text: str, normalize: bool = True) -> tuple:
+    """Последовательность символов для поиска палиндромов и позиции этих
+    символов в исходной строке. При normalize остаются только буквы и
+    цифры, приведённые через casefold."""
+    if not normalize:
+        return text, range(len(text))
+    positions = [pos for pos, char in enumerate(text) if char.isalnum()]
+    return [text[pos].casefold() for pos in positions], positions
+
+
+def manacher(keys) -> tuple:
+    """Алгоритм Манакера: радиусы палиндромов для каждого центра за
+    линейное время.
+
+    Возвращает два списка: odd[i] - число символов от центра i до конца
+    самого длинного палиндрома нечётной длины 2 * odd[i] - 1 с центром i,
+    even[i] - половина длины самого длинного палиндрома чётной длины
+    с центром между символами i - 1 и i.
+    """
+    size = len(keys)
+    odd = [0] * size
+    left, right = 0, -1
+    for i in range(size):
+        k = 1 if i > right else min(odd[left + right - i], right - i + 1)
+        while i - k >= 0 and i + k < size and keys[i - k] == keys[i + k]:
+            k += 1
+        odd[i] = k
+        if i + k - 1 > right:
+            left, right = i - k + 1, i + k - 1
+    even = [0] * size
+    left, right = 0, -1
+    for i in range(size):
+        k = 0 if i > right else min(even[left + right - i + 1], right - i + 1)
+        while i - k - 1 >= 0 and i + k < size and keys[i - k - 1] == keys[i + k]:
+            k += 1
+        even[i] = k
+        if i + k - 1 > right:
+            left, right = i - k, i + k - 1
+    return odd, even
+
+
+def iter_palindromes(text: str, min_length: int = PALINDROME_MIN_LENGTH, normalize: bool = True):
+    """Все максимальные палиндромы строки длиной от min_length символов:
+    для каждого центра берётся самый длинный палиндром с этим центром.
+
+    При normalize длина считается по буквам и цифрам, регистр, пробелы
+    и знаки препинания не учитываются: в строке "Топот, шалаш!" найдутся
+    (0, 5, "Топот") и (7, 12, "шалаш"), а вся строка "А роза упала на лапу
+    Азора" - палиндром длиной 21.
+
+    Возвращает кортежи (начало, конец, подстрока) в координатах исходной
+    строки в порядке центров палиндромов.
+    """
+    keys, positions = get_palindrome_keys(text, normalize)
+    odd, even = manacher(keys)
+    for i in range(len(keys)):
+        # Чётный палиндром с центром перед символом i идёт раньше нечётного
+        # с центром в символе i
+        for start, end in ((i - even[i], i + even[i] - 1), (i - odd[i] + 1, i + odd[i] - 1)):
+            if end - start + 1 >= max(min_length, 1):
+                yield positions[start], positions[end] + 1, text[positions[start]:positions[end] + 1]
+
+
+def longest_palindrome(text: str, normalize: bool = True) -> str:
+    """Самая длинная подстрока-палиндром (первая из самых длинных).
+    Смысл normalize тот же, что в iter_palindromes."""
+    keys, positions = get_palindrome_keys(text, normalize)
+    if not keys:
+        return ""
+    odd, even = manacher(keys)
+    best_start, best_length = 0, 0
+    for i in range(len(keys)):
+        for start, length in ((i - even[i], 2 * even[i]), (i - odd[i] + 1, 2 * odd[i] - 1)):
+            if length > best_length:
+                best_start, best_length = start, length
+    return text[positions[best_start]:positions[best_start + best_length - 1] + 1]
+
+
+def scan_lines(lines: list, min_length: int, normalize: bool) -> list:
+    """Палиндромы пачки строк: (номер строки, начало, конец, подстрока)"""
+    return [
+        (number, *palindrome)
+        for number, line in lines
+        for palindrome in iter_palindromes(line.rstrip("\r\n"), min_length, normalize)
+    ]
+
+
+def scan_corpus(
+    file: Path,
+    min_length: int = PALINDROME_MIN_LENGTH,
+    normalize: bool = True,
+    workers: int | None = None,
+    batch_lines: int = PALINDROME_BATCH_LINES,
+):
+    """Поиск палиндромов в большом текстовом файле по строкам на пуле
+    процессов.
+
+    Файл читается построчно, строки отправляются процессам пачками по
+    batch_lines. В работе одновременно не больше двух пачек на процесс,
+    поэтому память не зависит от размера файла. При workers равном нулю
+    строки обрабатываются в текущем процессе.
+
+    Возвращает кортежи (номер строки с 1, начало, конец, подстрока)
+    в порядке следования в файле.
+    """
+    with open(file, encoding="utf-8") as corpus:
+        lines = enumerate(corpus, 1)
+        batches = iter(lambda: list(islice(lines, batch_lines)), [])
+        for palindromes in iter_bounded_map(
+            scan_lines, batches, min_length, normalize, workers=workers
+        ):
+            yield from palindromes
 
 
 # print(is_palindrome("А роза упала на лапу Азора"))
@@ -121,3 +831,7 @@ roman_number = converter.arabic_to_roman(2222)
 print(roman_number)  # Вывод: MMCCXXII
 roman_number = converter.arabic_to_roman(3999)
 print(roman_number)  # Вывод: MMMCMXCIX
+
+
+if __name__ == "__main__":
+    print(rle_benchmark())
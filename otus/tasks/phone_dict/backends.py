@@ -0,0 +1,1120 @@
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Mapping
+from heapq import nsmallest
+from itertools import dropwhile, islice
+from operator import itemgetter
+from pathlib import Path
+
+from snapshot import (
+    BinarySnapshot,
+    get_snapshot_file,
+    open_snapshot,
+    write_binary_snapshot,
+)
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+
+
+SEARCH_FIELDS = ("name", "phone", "comment")
+CONTACT_COLUMNS = ("id",) + SEARCH_FIELDS
+INTERNED_FIELDS = ("name", "comment")
+NGRAM_SIZE = 3
+DEFAULT_COUNTRY_CODE = ""
+TRUNK_PREFIX = "8"
+NATIONAL_NUMBER_LENGTH = 10
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_SIZE = 1024 * 1024
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+BOOK_SUFFIXES = (".json",) + SQLITE_SUFFIXES
+LAZY_LOAD_SIZE = 64 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+NON_DIGIT_RE = re.compile(r"[^0-9]+")
+CONTACTS_ARRAY_RE = re.compile(r'"contacts"\s*:\s*\[')
+CONTACTS_KEY_TAIL = 64
+JSON_SEPARATORS = " \t\r\n,"
+ORDER_BY_POS = "pos"
+ORDER_BY_ID = "id"
+ORDER_BY_NAME = "name"
+CSV_SUFFIX = ".csv"
+JSONL_SUFFIX = ".jsonl"
+EXCHANGE_SUFFIXES = (CSV_SUFFIX, JSONL_SUFFIX)
+SQLITE_MAX_VARIABLES = 500
+SORT_KEYS = {
+    ORDER_BY_ID: itemgetter("id"),
+    ORDER_BY_NAME: itemgetter("name", "id"),
+}
+
+
+def get_ngrams(value: str) -> set:
+    """Множество подстрок длины NGRAM_SIZE, входящих в строку"""
+    return {value[i:i + NGRAM_SIZE] for i in range(len(value) - NGRAM_SIZE + 1)}
+
+
+def normalize_phone(phone: str, country_code: str = DEFAULT_COUNTRY_CODE) -> str:
+    """Приведение номера телефона к ключу поиска из одних цифр.
+
+    Аргументы:
+    phone: номер телефона в произвольной записи,
+    country_code: код страны. Если задан, национальные номера без "+"
+    (с префиксом TRUNK_PREFIX или из NATIONAL_NUMBER_LENGTH цифр)
+    дополняются кодом страны.
+    """
+    key = NON_DIGIT_RE.sub("", phone)
+    if country_code and not phone.lstrip().startswith("+"):
+        if len(key) == NATIONAL_NUMBER_LENGTH + 1 and key.startswith(TRUNK_PREFIX):
+            key = country_code + key[1:]
+        elif len(key) == NATIONAL_NUMBER_LENGTH:
+            key = country_code + key
+    return key
+
+
+def get_next_prefix(prefix: str) -> str:
+    """Наименьшая строка, большая всех строк, начинающихся с prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def get_journal_file(json_file: Path) -> Path:
+    """Путь к журналу изменений, хранящемуся рядом со снимком справочника"""
+    return json_file.with_name(json_file.name + JOURNAL_SUFFIX)
+
+
+def write_file_atomic(file: Path, data: str):
+    """Запись файла через временный файл и переименование, чтобы при сбое
+    на диске оставалась либо старая, либо новая версия целиком."""
+    tmp_file = file.with_name(file.name + ".tmp")
+    with tmp_file.open("w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file)
+
+
+def get_contact_ngrams(contact: dict) -> set:
+    """Объединение n-грамм всех полей контакта, по которым идёт поиск"""
+    ngrams = set()
+    for field in SEARCH_FIELDS:
+        ngrams |= get_ngrams(contact.get(field) or "")
+    return ngrams
+
+
+def iter_json_contacts(file: Path, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Потоковое чтение массива contacts из JSON-файла справочника.
+    Файл читается блоками по chunk_size символов, контакты возвращаются
+    по одному по мере разбора, весь файл в память не загружается.
+    """
+    decoder = json.JSONDecoder()
+    with file.open(encoding="utf-8") as f:
+        buffer = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            match = CONTACTS_ARRAY_RE.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            # Ключ мог разорваться на границе блоков
+            buffer = buffer[-CONTACTS_KEY_TAIL:]
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in JSON_SEPARATORS:
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Нужен следующий блок", buffer, pos)
+                contact, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"Файл {file} оборван внутри массива contacts")
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield contact
+
+
+def to_contact_dict(row: Mapping) -> dict:
+    """Приведение строки импортируемого файла к словарю контакта со
+    строковыми значениями всех полей"""
+    return {
+        field: "" if row.get(field) is None else str(row.get(field))
+        for field in CONTACT_COLUMNS
+    }
+
+
+def parse_json_line(line: str) -> dict | None:
+    """Объект из строки JSON Lines или None, если строка не является
+    JSON-объектом"""
+    try:
+        row = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def iter_exchange_contacts(file: Path):
+    """Потоковое чтение контактов из файла CSV (с заголовком из названий
+    полей) или JSON Lines (один объект контакта в строке). Вместо строк
+    JSON Lines, которые не являются JSON-объектами, возвращается None."""
+    suffix = file.suffix.lower()
+    if suffix not in EXCHANGE_SUFFIXES:
+        raise ValueError(f"Неподдерживаемый формат файла: {file.name}")
+    with file.open(encoding="utf-8", newline="") as f:
+        if suffix == CSV_SUFFIX:
+            rows = csv.DictReader(f)
+        else:
+            rows = (parse_json_line(line) for line in f if line.strip())
+        for row in rows:
+            yield None if row is None else to_contact_dict(row)
+
+
+def write_exchange_contacts(file: Path, contacts) -> int:
+    """Потоковая запись контактов в файл CSV или JSON Lines.
+    Возвращает число записанных контактов."""
+    suffix = file.suffix.lower()
+    if suffix not in EXCHANGE_SUFFIXES:
+        raise ValueError(f"Неподдерживаемый формат файла: {file.name}")
+    count = 0
+    with file.open("w", encoding="utf-8", newline="") as f:
+        if suffix == CSV_SUFFIX:
+            writer = csv.DictWriter(f, CONTACT_COLUMNS)
+            writer.writeheader()
+            for contact in contacts:
+                writer.writerow(contact)
+                count += 1
+        else:
+            for contact in contacts:
+                f.write(json.dumps(dict(contact), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def iter_batches(items, batch_size: int):
+    """Разбиение перебираемой последовательности на списки по batch_size"""
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
+
+
+def is_contact_matched(contact: dict, query: str) -> bool:
+    """Условие поиска контакта: совпадение ID или вхождение строки в поля"""
+    return contact.get("id") == query or any(
+        query in contact.get(field) for field in SEARCH_FIELDS
+    )
+
+
+def get_name_order_key(contact: Mapping) -> tuple:
+    """Ключ порядка ORDER_BY_NAME: (имя, ID)"""
+    return (contact.get("name") or "", contact.get("id"))
+
+
+def select_page(
+    contacts,
+    order_by: str = ORDER_BY_POS,
+    limit: int = 50,
+    offset: int = 0,
+    after: Mapping | None = None,
+) -> list:
+    """Выбор страницы из перебираемых контактов.
+
+    Аргументы:
+    contacts: контакты в порядке следования в справочнике,
+    order_by: порядок страницы: ORDER_BY_POS, ORDER_BY_ID или ORDER_BY_NAME,
+    limit: размер страницы,
+    offset: число пропускаемых контактов,
+    after: последний контакт предыдущей страницы (курсор).
+
+    В порядке следования перебирается не больше offset + limit контактов
+    после курсора. Для сортировки по полям весь поток просматривается
+    один раз с кучей размера offset + limit.
+    """
+    if order_by == ORDER_BY_POS:
+        if after is not None:
+            after_id = after["id"]
+            contacts = dropwhile(lambda contact: contact["id"] != after_id, contacts)
+            next(contacts, None)
+        return list(islice(contacts, offset, offset + limit))
+    key = SORT_KEYS[order_by]
+    if after is not None:
+        after_key = key(after)
+        contacts = (contact for contact in contacts if key(contact) > after_key)
+    return nsmallest(offset + limit, contacts, key=key)[offset:]
+
+
+def is_sqlite_file(file: Path) -> bool:
+    return file.suffix.lower() in SQLITE_SUFFIXES
+
+
+def open_backend(
+    file: Path,
+    country_code: str = DEFAULT_COUNTRY_CODE,
+    journaled: bool = False,
+    binary_snapshot: bool = False,
+):
+    """Открытие хранилища справочника. Тип хранилища выбирается
+    по расширению файла: SQLite для SQLITE_SUFFIXES, иначе JSON.
+    """
+    if is_sqlite_file(file):
+        return SqliteBackend(file, country_code)
+    return JsonBackend(file, country_code, journaled, binary_snapshot)
+
+
+class ContactView(Mapping):
+    """Лёгкое представление контакта, хранящегося в столбцах JsonBackend.
+    Ведёт себя как словарь только для чтения и не копирует поля.
+    Представление действительно до уплотнения хранилища.
+    """
+
+    __slots__ = ("columns", "pos")
+
+    def __init__(self, columns: dict, pos: int):
+        self.columns = columns
+        self.pos = pos
+
+    def __getitem__(self, field: str) -> str:
+        return self.columns[field][self.pos]
+
+    def __iter__(self):
+        return iter(CONTACT_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(CONTACT_COLUMNS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class JsonBackend:
+    """Справочник в JSON-файле, загруженный в память, с индексами по ID,
+    n-граммам и номерам телефонов.
+
+    Контакты хранятся по столбцам: для каждого поля свой список значений,
+    повторяющиеся имена и комментарии интернируются. Наружу контакты
+    выдаются как ContactView.
+
+    Файлы больше LAZY_LOAD_SIZE загружаются лениво: операции чтения
+    разбирают файл потоком, а в память он загружается целиком только
+    перед первым изменением.
+
+    ID контактов уникальны. Старые файлы могли сохраниться с повторными ID:
+    при загрузке такого файла остаётся первый контакт с каждым ID, остальные
+    попадают в duplicate_contacts и при сохранении в файл не записываются.
+
+    Если рядом с файлом есть актуальный двоичный снимок (см. snapshot.py),
+    файл не разбирается вовсе: до первого изменения операции чтения
+    обращаются к снимку, отображённому в память. Снимок перезаписывается
+    при сохранении полного файла, если включён binary_snapshot.
+    """
+
+    file: Path
+    columns: dict
+    id_index: dict
+    ngram_index: dict | None
+    phone_index: list | None
+    id_order: list | None
+    name_order: list | None
+    country_code: str
+    removed_count: int
+    duplicate_contacts: list
+    journaled: bool
+    journal_records: list
+    is_snapshot_required: bool
+    is_loaded: bool
+    binary_snapshot: bool
+    mapped: BinarySnapshot | None
+
+    def __init__(
+        self,
+        file: Path,
+        country_code: str = DEFAULT_COUNTRY_CODE,
+        journaled: bool = False,
+        binary_snapshot: bool = False,
+    ):
+        self.file = file
+        self.columns = {field: [] for field in CONTACT_COLUMNS}
+        self.id_index = {}
+        self.ngram_index = None
+        self.phone_index = None
+        self.id_order = None
+        self.name_order = None
+        self.country_code = country_code
+        self.removed_count = 0
+        self.duplicate_contacts = []
+        self.journaled = journaled
+        self.journal_records = []
+        self.is_snapshot_required = False
+        self.is_loaded = False
+        self.binary_snapshot = binary_snapshot
+        self.mapped = None
+        self.load()
+
+    def load(self):
+        """Чтение файла с диска. При необходимости создание и инициализация.
+        Если рядом со снимком есть журнал изменений, он применяется поверх
+        снимка. Файлы без журнала с актуальным двоичным снимком и большие
+        файлы без журнала только открываются, а разбираются при обращении
+        к контактам.
+        """
+        if not self.file.exists():
+            with self.file.open("w", encoding="utf-8") as f:
+                json.dump(
+                    {"contacts": []},
+                    f,
+                    ensure_ascii=False,
+                    indent=4,
+                    sort_keys=True,
+                )
+        if not get_journal_file(self.file).exists():
+            self.mapped = open_snapshot(self.file, self.country_code)
+            if self.mapped is not None or self.file.stat().st_size > LAZY_LOAD_SIZE:
+                return
+        self.materialize()
+
+    def materialize(self):
+        """Полная загрузка файла в память с построением индексов.
+        Файл разбирается потоком, поэтому словари контактов не накапливаются.
+        Вместо разбора файла контакты по возможности читаются из двоичного
+        снимка.
+        """
+        if self.is_loaded:
+            return
+        snapshot = self.mapped or open_snapshot(self.file, self.country_code)
+        if snapshot is None:
+            self.build_index(iter_json_contacts(self.file))
+        else:
+            self.build_index(snapshot.iter_views())
+            if snapshot is not self.mapped:
+                snapshot.close()
+        self.is_loaded = True
+        self.replay_journal(get_journal_file(self.file))
+        self.journal_records = []
+        self.is_snapshot_required = False
+
+    def save(self, file: Path):
+        """Сохранение контактов в файл.
+
+        В режиме журнала изменения дописываются в журнал рядом со снимком,
+        а полный снимок перезаписывается, только когда журнал превысил
+        JOURNAL_COMPACT_SIZE, данные были заменены целиком или файл
+        сохраняется под новым именем.
+        """
+        if not self.is_loaded and file == self.file:
+            return
+        self.materialize()
+        if self.journaled and file == self.file and not self.is_snapshot_required:
+            journal_file = self.append_journal(file)
+            if journal_file.stat().st_size > JOURNAL_COMPACT_SIZE:
+                self.write_snapshot(file)
+        else:
+            self.write_snapshot(file)
+        self.journal_records = []
+        self.is_snapshot_required = False
+        self.file = file
+
+    def close(self):
+        self.close_mapped()
+
+    def close_mapped(self):
+        """Закрытие отображённого двоичного снимка. Выданные из него
+        представления контактов после этого недействительны."""
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def write_snapshot(self, file: Path):
+        """Атомарная запись полного снимка и удаление ставшего ненужным журнала.
+        Двоичный снимок записывается после JSON-файла, поэтому при сбое между
+        ними он остаётся устаревшим и при открытии не используется."""
+        write_file_atomic(
+            file,
+            json.dumps(
+                {"contacts": self.get_contacts_list()},
+                ensure_ascii=False,
+                indent=4,
+                sort_keys=True,
+            ),
+        )
+        get_journal_file(file).unlink(missing_ok=True)
+        self.close_mapped()
+        if self.binary_snapshot:
+            write_binary_snapshot(
+                file,
+                [
+                    tuple(contact[field] for field in CONTACT_COLUMNS)
+                    + (self.get_phone_key(contact)[0],)
+                    for contact in self.iter_views()
+                ],
+                self.country_code,
+            )
+        else:
+            get_snapshot_file(file).unlink(missing_ok=True)
+
+    def append_journal(self, file: Path) -> Path:
+        """Дописывание накопленных изменений в журнал. Возвращает путь журнала."""
+        journal_file = get_journal_file(file)
+        with journal_file.open("a", encoding="utf-8") as f:
+            for record in self.journal_records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return journal_file
+
+    def replay_journal(self, journal_file: Path):
+        """Применение записей журнала к загруженному снимку.
+
+        Записи идемпотентны, поэтому повторное применение журнала после сбоя
+        между записью снимка и удалением журнала не портит данные. Оборванная
+        последняя строка отрезается, чтобы к ней не приклеились новые записи.
+        Оборванной считается и строка без завершающего перевода строки, даже
+        если она разбирается как JSON: запись не была дописана до конца.
+        """
+        if not journal_file.exists():
+            return
+        with journal_file.open("rb+") as f:
+            offset = 0
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Оборванная строка журнала")
+                    record = json.loads(line)
+                except (ValueError, UnicodeDecodeError):
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+                if record["op"] == "put":
+                    contact = record["contact"]
+                    if self.get(contact["id"]) is None:
+                        self.append(contact)
+                    else:
+                        self.update(contact["id"], contact)
+                elif record["op"] == "del" and self.get(record["id"]) is not None:
+                    self.delete(record["id"])
+
+    def record_change(self, record: dict):
+        """Запоминание изменения для записи в журнал при сохранении"""
+        if self.journaled:
+            self.journal_records.append(record)
+
+    def set_field(self, pos: int, field: str, value: str | None):
+        """Запись значения поля в столбец. Имена и комментарии интернируются,
+        чтобы повторяющиеся значения хранились в одном экземпляре."""
+        if field in INTERNED_FIELDS and value is not None:
+            value = sys.intern(value)
+        self.columns[field][pos] = value
+
+    def put_row(self, contact: Mapping):
+        """Добавление контакта в конец столбцов. Возвращает его позицию."""
+        pos = len(self.columns["id"])
+        for field in CONTACT_COLUMNS:
+            self.columns[field].append(None)
+            self.set_field(pos, field, contact.get(field))
+        return pos
+
+    def build_index(self, contacts):
+        """Заполнение столбцов и построение индекса по ID. Индексы по
+        n-граммам полей, по нормализованным номерам телефонов и порядки
+        страниц строятся при первом обращении (методы get_*_index и
+        get_*_order), поэтому открытие файла не тратит на них время
+        и память. Изменения дополняют только уже построенные индексы.
+
+        Аргументы:
+        contacts: перебираемые контакты без удалённых записей. Из контактов
+        с одинаковым ID остаётся первый, остальные сохраняются копиями
+        в duplicate_contacts.
+        """
+        self.columns = {field: [] for field in CONTACT_COLUMNS}
+        self.duplicate_contacts = []
+        id_index = {}
+        for contact in contacts:
+            id = contact.get("id")
+            if id in id_index:
+                self.duplicate_contacts.append({field: contact.get(field) for field in CONTACT_COLUMNS})
+            else:
+                id_index[id] = self.put_row(contact)
+        self.id_index = id_index
+        self.removed_count = 0
+        # Остальные индексы строятся при первом обращении
+        self.ngram_index = None
+        self.phone_index = None
+        self.id_order = None
+        self.name_order = None
+
+    def get_ngram_index(self) -> dict:
+        """Инвертированный индекс n-грамм, построенный при первом поиске"""
+        if self.ngram_index is None:
+            self.ngram_index = {}
+            for contact in self.iter_views():
+                self.index_ngrams(contact)
+        return self.ngram_index
+
+    def get_phone_index(self) -> list:
+        """Отсортированный индекс телефонов, построенный при первом поиске
+        по номеру"""
+        if self.phone_index is None:
+            self.phone_index = sorted(
+                self.get_phone_key(contact) for contact in self.iter_views()
+            )
+        return self.phone_index
+
+    def get_id_order(self) -> list:
+        """Отсортированные ID для страниц ORDER_BY_ID"""
+        if self.id_order is None:
+            self.id_order = sorted(self.id_index)
+        return self.id_order
+
+    def get_name_order(self) -> list:
+        """Отсортированные ключи (имя, ID) для страниц ORDER_BY_NAME"""
+        if self.name_order is None:
+            self.name_order = sorted(
+                get_name_order_key(contact) for contact in self.iter_views()
+            )
+        return self.name_order
+
+    def build_id_index(self):
+        """Построение индекса ID -> позиция контакта в столбцах"""
+        id_index = {}
+        for pos, id in enumerate(self.columns["id"]):
+            if id in id_index:
+                raise ValueError(f"Контакт с ID {id} встречается повторно")
+            id_index[id] = pos
+        self.id_index = id_index
+        self.removed_count = 0
+
+    def index_ngrams(self, contact: Mapping):
+        """Добавление контакта в инвертированный индекс n-грамм, если он
+        уже построен. Так же поступают остальные методы index_* и unindex_*."""
+        if self.ngram_index is None:
+            return
+        id = contact.get("id")
+        for ngram in get_contact_ngrams(contact):
+            self.ngram_index.setdefault(ngram, set()).add(id)
+
+    def unindex_ngrams(self, contact: Mapping):
+        """Удаление контакта из инвертированного индекса n-грамм"""
+        if self.ngram_index is None:
+            return
+        id = contact.get("id")
+        for ngram in get_contact_ngrams(contact):
+            ids = self.ngram_index.get(ngram)
+            ids.discard(id)
+            if not ids:
+                del self.ngram_index[ngram]
+
+    def get_phone_key(self, contact: Mapping) -> tuple:
+        """Элемент индекса телефонов: (нормализованный номер, ID)"""
+        return (
+            normalize_phone(contact.get("phone") or "", self.country_code),
+            contact.get("id"),
+        )
+
+    def index_phone(self, contact: Mapping):
+        """Добавление номера контакта в отсортированный индекс телефонов"""
+        if self.phone_index is not None:
+            insort(self.phone_index, self.get_phone_key(contact))
+
+    def unindex_phone(self, contact: Mapping):
+        """Удаление номера контакта из отсортированного индекса телефонов"""
+        if self.phone_index is not None:
+            key = self.get_phone_key(contact)
+            del self.phone_index[bisect_left(self.phone_index, key)]
+
+    def index_order(self, contact: Mapping, is_id_kept: bool = False):
+        """Добавление контакта в отсортированные индексы страниц по ID и по
+        имени. При is_id_kept индекс по ID не меняется: ID контакта не
+        изменяется при обновлении."""
+        if self.id_order is not None and not is_id_kept:
+            insort(self.id_order, contact.get("id"))
+        if self.name_order is not None:
+            insort(self.name_order, get_name_order_key(contact))
+
+    def unindex_order(self, contact: Mapping, is_id_kept: bool = False):
+        """Удаление контакта из отсортированных индексов страниц"""
+        if self.id_order is not None and not is_id_kept:
+            del self.id_order[bisect_left(self.id_order, contact.get("id"))]
+        if self.name_order is not None:
+            key = get_name_order_key(contact)
+            del self.name_order[bisect_left(self.name_order, key)]
+
+    def compact(self):
+        """Удаление из столбцов мест, освобождённых методом delete"""
+        if not self.removed_count:
+            return
+        ids = self.columns["id"]
+        positions = [pos for pos, id in enumerate(ids) if id is not None]
+        for field, values in self.columns.items():
+            self.columns[field] = [values[pos] for pos in positions]
+        self.build_id_index()
+
+    def iter_views(self, start: int = 0):
+        """Перебор представлений неудалённых контактов начиная с позиции start"""
+        columns = self.columns
+        ids = columns["id"]
+        return (
+            ContactView(columns, pos)
+            for pos in range(start, len(ids))
+            if ids[pos] is not None
+        )
+
+    def get_contacts_list(self) -> list:
+        """Копии всех контактов в виде словарей"""
+        if not self.is_loaded:
+            return [dict(contact) for contact in self.iter_contacts()]
+        return [dict(contact) for contact in self.iter_views()]
+
+    def iter_contacts(self):
+        if self.is_loaded:
+            return self.iter_views()
+        if self.mapped is not None:
+            return self.mapped.iter_views()
+        return iter_json_contacts(self.file)
+
+    def set_contacts_list(self, contacts: list):
+        self.is_loaded = True
+        self.build_index(contacts)
+        self.is_snapshot_required = True
+
+    def append(self, contact: Mapping):
+        self.materialize()
+        id = contact.get("id")
+        if id in self.id_index:
+            raise ValueError(f"Контакт с ID {id} уже существует")
+        pos = self.put_row(contact)
+        self.id_index[id] = pos
+        view = ContactView(self.columns, pos)
+        self.index_ngrams(view)
+        self.index_phone(view)
+        self.index_order(view)
+        self.record_change({"op": "put", "contact": dict(view)})
+
+    def append_many(self, contacts: list):
+        """Добавление пакета контактов. Построенные отсортированные индексы
+        дополняются и сортируются один раз на весь пакет."""
+        self.materialize()
+        for contact in contacts:
+            if contact.get("id") in self.id_index:
+                raise ValueError(f"Контакт с ID {contact.get('id')} уже существует")
+        views = []
+        for contact in contacts:
+            pos = self.put_row(contact)
+            self.id_index[contact.get("id")] = pos
+            view = ContactView(self.columns, pos)
+            self.index_ngrams(view)
+            views.append(view)
+            self.record_change({"op": "put", "contact": dict(view)})
+        for index, get_key in (
+            (self.phone_index, self.get_phone_key),
+            (self.id_order, itemgetter("id")),
+            (self.name_order, get_name_order_key),
+        ):
+            if index is not None:
+                index.extend(map(get_key, views))
+                index.sort()
+
+    def get_existing_ids(self, ids) -> set:
+        """ID из ids, уже имеющиеся в справочнике"""
+        self.materialize()
+        return {id for id in ids if id in self.id_index}
+
+    def get(self, id: str) -> Mapping | None:
+        if not self.is_loaded and self.mapped is not None:
+            return self.mapped.get(id)
+        if not self.is_loaded:
+            return next((c for c in self.iter_contacts() if c.get("id") == id), None)
+        pos = self.id_index.get(id)
+        return None if pos is None else ContactView(self.columns, pos)
+
+    def update(self, id: str, fields: dict) -> Mapping:
+        self.materialize()
+        contact = self.get(id)
+        if contact is None:
+            raise KeyError(id)
+        self.unindex_ngrams(contact)
+        self.unindex_phone(contact)
+        self.unindex_order(contact, is_id_kept=True)
+        for field, value in fields.items():
+            if field != "id":
+                self.set_field(contact.pos, field, value)
+        self.index_ngrams(contact)
+        self.index_phone(contact)
+        self.index_order(contact, is_id_kept=True)
+        self.record_change({"op": "put", "contact": dict(contact)})
+        return contact
+
+    def delete(self, id: str) -> dict:
+        """Освободившееся место в столбцах помечается как пустое, поэтому
+        порядок остальных контактов и их позиции в индексе не меняются.
+        Столбцы уплотняются, когда пустых мест становится больше половины.
+        """
+        self.materialize()
+        pos = self.id_index.pop(id)
+        view = ContactView(self.columns, pos)
+        self.unindex_ngrams(view)
+        self.unindex_phone(view)
+        self.unindex_order(view)
+        contact = dict(view)
+        for values in self.columns.values():
+            values[pos] = None
+        self.removed_count += 1
+        if self.removed_count * 2 > len(self.columns["id"]):
+            self.compact()
+        self.record_change({"op": "del", "id": id})
+        return contact
+
+    def iter_find(self, query: str):
+        """Кандидаты отбираются пересечением списков из индекса n-грамм,
+        затем проверяются точным сравнением прямо по столбцам. Запросы
+        короче NGRAM_SIZE проверяются полным просмотром столбцов, запросы
+        к незагруженному файлу - поиском в двоичном снимке или потоковым
+        чтением файла.
+        """
+        if not self.is_loaded and self.mapped is not None:
+            return self.mapped.iter_find(query)
+        if not self.is_loaded:
+            return (c for c in self.iter_contacts() if is_contact_matched(c, query))
+        ids, names, phones, comments = (self.columns[field] for field in CONTACT_COLUMNS)
+        if len(query) < NGRAM_SIZE:
+            positions = range(len(ids))
+        else:
+            ngram_index = self.get_ngram_index()
+            id_sets = sorted(
+                (ngram_index.get(ngram, set()) for ngram in get_ngrams(query)),
+                key=len,
+            )
+            matched_ids = set(id_sets[0]).intersection(*id_sets[1:])
+            if query in self.id_index:
+                matched_ids.add(query)
+            positions = sorted(self.id_index[id] for id in matched_ids)
+        return (
+            ContactView(self.columns, pos)
+            for pos in positions
+            if ids[pos] is not None
+            and (
+                ids[pos] == query
+                or query in names[pos]
+                or query in phones[pos]
+                or query in comments[pos]
+            )
+        )
+
+    def get_page(
+        self,
+        query: str,
+        order_by: str,
+        limit: int,
+        offset: int = 0,
+        after: Mapping | None = None,
+    ) -> list:
+        if (
+            self.is_loaded
+            and not query
+            and order_by == ORDER_BY_POS
+            and after is not None
+            and after["id"] in self.id_index
+        ):
+            contacts = self.iter_views(self.id_index[after["id"]] + 1)
+            return list(islice(contacts, offset, offset + limit))
+        if (
+            not self.is_loaded
+            and self.mapped is not None
+            and not query
+            and order_by == ORDER_BY_POS
+            and after is not None
+            and (pos := self.mapped.get_pos(after["id"])) is not None
+        ):
+            contacts = self.mapped.iter_views(pos + 1)
+            return list(islice(contacts, offset, offset + limit))
+        if self.is_loaded and not query and order_by in SORT_KEYS:
+            # Страница по отсортированному индексу: курсор находится
+            # бинарным поиском, читаются только offset + limit элементов
+            if order_by == ORDER_BY_ID:
+                order, cursor = self.get_id_order(), after and after["id"]
+            else:
+                order, cursor = self.get_name_order(), after and get_name_order_key(after)
+            start = 0 if after is None else bisect_right(order, cursor)
+            keys = order[start + offset:start + offset + limit]
+            if order_by == ORDER_BY_NAME:
+                keys = [id for _, id in keys]
+            return [self.get(id) for id in keys]
+        contacts = self.iter_find(query) if query else self.iter_contacts()
+        return select_page(contacts, order_by, limit, offset, after)
+
+    def find_by_phone_range(self, key: str, next_key: str) -> list:
+        if not self.is_loaded and self.mapped is not None:
+            return self.mapped.find_by_phone_range(key, next_key)
+        if not self.is_loaded:
+            keys = (self.get_phone_key(contact) + (contact,) for contact in self.iter_contacts())
+            matched = [item for item in keys if key <= item[0] < next_key]
+            return [contact for *_, contact in sorted(matched, key=lambda item: item[:2])]
+        phone_index = self.get_phone_index()
+        lo = bisect_left(phone_index, (key,))
+        hi = bisect_left(phone_index, (next_key,))
+        return [self.get(id) for _, id in phone_index[lo:hi]]
+
+
+class SqliteBackend:
+    """Справочник в базе SQLite. Контакты не загружаются в память целиком:
+    поиск выполняется запросами по индексам базы. Изменения накапливаются
+    в открытой транзакции и фиксируются методом save. База работает
+    в режиме WAL, поэтому другие процессы могут читать её одновременно
+    с записью.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS contacts (
+            pos INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL DEFAULT '',
+            phone TEXT NOT NULL DEFAULT '',
+            comment TEXT NOT NULL DEFAULT '',
+            phone_key TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS contacts_name ON contacts (name);
+        CREATE INDEX IF NOT EXISTS contacts_phone_key ON contacts (phone_key, id);
+    """
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5 (
+            name, phone, comment,
+            content='contacts', content_rowid='pos',
+            tokenize='trigram case_sensitive 1'
+        );
+        CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts (rowid, name, phone, comment)
+            VALUES (new.pos, new.name, new.phone, new.comment);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, name, phone, comment)
+            VALUES ('delete', old.pos, old.name, old.phone, old.comment);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, name, phone, comment)
+            VALUES ('delete', old.pos, old.name, old.phone, old.comment);
+            INSERT INTO contacts_fts (rowid, name, phone, comment)
+            VALUES (new.pos, new.name, new.phone, new.comment);
+        END;
+    """
+    COLUMNS = "id, name, phone, comment"
+    INSERT = (
+        "INSERT INTO contacts (id, name, phone, comment, phone_key)"
+        " VALUES (?, ?, ?, ?, ?)"
+    )
+    ORDER_BY_COLUMNS = {
+        ORDER_BY_POS: "pos",
+        ORDER_BY_ID: "id",
+        ORDER_BY_NAME: "name, id",
+    }
+    AFTER_CONDITIONS = {
+        ORDER_BY_POS: "pos > (SELECT pos FROM contacts WHERE id = :after_id)",
+        ORDER_BY_ID: "id > :after_id",
+        ORDER_BY_NAME: "(name, id) > (:after_name, :after_id)",
+    }
+    MATCH_CONDITION = (
+        "(id = :query OR instr(name, :query) OR instr(phone, :query)"
+        " OR instr(comment, :query))"
+    )
+
+    file: Path
+    country_code: str
+    connection: sqlite3.Connection
+    has_fts: bool
+    # В базе ID уникальны, список всегда пуст (см. JsonBackend)
+    duplicate_contacts: list
+
+    def __init__(self, file: Path, country_code: str = DEFAULT_COUNTRY_CODE):
+        self.file = file
+        self.country_code = country_code
+        self.connection = self.connect(file)
+        self.duplicate_contacts = []
+
+    def connect(self, file: Path) -> sqlite3.Connection:
+        """Открытие базы с созданием схемы при необходимости"""
+        connection = sqlite3.connect(file)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(self.SCHEMA)
+        try:
+            connection.executescript(self.FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite собран без FTS5 или без токенизатора trigram
+            self.has_fts = False
+        connection.commit()
+        return connection
+
+    def save(self, file: Path):
+        """Фиксация изменений. При сохранении под новым именем база
+        копируется в новый файл, и работа продолжается с ним."""
+        self.connection.commit()
+        if file != self.file:
+            connection = sqlite3.connect(file)
+            self.connection.backup(connection)
+            connection.close()
+            self.close()
+            self.file = file
+            self.connection = self.connect(file)
+
+    def close(self):
+        """Закрытие базы. Незафиксированные изменения откатываются."""
+        self.connection.close()
+
+    def to_dict(self, row: sqlite3.Row) -> dict:
+        return {"id": row["id"], "name": row["name"], "phone": row["phone"],
+                "comment": row["comment"]}
+
+    def iter_select(
+        self,
+        where: str = "",
+        params=(),
+        order_by: str = "pos",
+        limit: int = -1,
+        offset: int = 0,
+    ):
+        """Построчное чтение контактов запросом к базе"""
+        sql = f"SELECT {self.COLUMNS} FROM contacts"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order_by} LIMIT {int(limit)} OFFSET {int(offset)}"
+        return (self.to_dict(row) for row in self.connection.execute(sql, params))
+
+    def select(
+        self,
+        where: str = "",
+        params=(),
+        order_by: str = "pos",
+        limit: int = -1,
+        offset: int = 0,
+    ) -> list:
+        return list(self.iter_select(where, params, order_by, limit, offset))
+
+    def get_contacts_list(self) -> list:
+        return self.select()
+
+    def iter_contacts(self):
+        return self.iter_select()
+
+    def set_contacts_list(self, contacts: list):
+        self.connection.execute("DELETE FROM contacts")
+        self.append_many(contacts)
+
+    def to_row(self, contact: Mapping) -> tuple:
+        """Значения столбцов для вставки контакта в таблицу"""
+        return (
+            contact.get("id"),
+            contact.get("name") or "",
+            contact.get("phone") or "",
+            contact.get("comment") or "",
+            normalize_phone(contact.get("phone") or "", self.country_code),
+        )
+
+    def append(self, contact: dict):
+        try:
+            self.connection.execute(self.INSERT, self.to_row(contact))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Контакт с ID {contact.get('id')} уже существует")
+
+    def append_many(self, contacts: list):
+        try:
+            self.connection.executemany(self.INSERT, map(self.to_row, contacts))
+        except sqlite3.IntegrityError:
+            raise ValueError("Пакет содержит ID уже существующих контактов")
+
+    def get_existing_ids(self, ids) -> set:
+        """ID из ids, уже имеющиеся в справочнике"""
+        existing = set()
+        for batch in iter_batches(ids, SQLITE_MAX_VARIABLES):
+            placeholders = ", ".join("?" * len(batch))
+            existing.update(
+                row["id"]
+                for row in self.connection.execute(
+                    f"SELECT id FROM contacts WHERE id IN ({placeholders})", batch
+                )
+            )
+        return existing
+
+    def get(self, id: str) -> dict | None:
+        contacts = self.select("id = ?", (id,))
+        return contacts[0] if contacts else None
+
+    def update(self, id: str, fields: dict) -> dict:
+        contact = self.get(id)
+        if contact is None:
+            raise KeyError(id)
+        contact.update(fields)
+        self.connection.execute(
+            "UPDATE contacts SET name = ?, phone = ?, comment = ?, phone_key = ?"
+            " WHERE id = ?",
+            (
+                contact["name"],
+                contact["phone"],
+                contact["comment"],
+                normalize_phone(contact["phone"], self.country_code),
+                id,
+            ),
+        )
+        return contact
+
+    def delete(self, id: str) -> dict:
+        contact = self.get(id)
+        if contact is None:
+            raise KeyError(id)
+        self.connection.execute("DELETE FROM contacts WHERE id = ?", (id,))
+        return contact
+
+    def get_find_condition(self, query: str) -> tuple:
+        """Условие WHERE и параметры поиска. Кандидаты отбираются
+        полнотекстовым индексом триграмм, затем проверяются точным
+        сравнением, как и в JsonBackend."""
+        params = {"query": query}
+        if not self.has_fts or len(query) < NGRAM_SIZE:
+            return self.MATCH_CONDITION, params
+        params["phrase"] = '"' + query.replace('"', '""') + '"'
+        return (
+            "((pos IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH :phrase)"
+            f" AND {self.MATCH_CONDITION}) OR id = :query)",
+            params,
+        )
+
+    def iter_find(self, query: str):
+        return self.iter_select(*self.get_find_condition(query))
+
+    def get_page(
+        self,
+        query: str,
+        order_by: str,
+        limit: int,
+        offset: int = 0,
+        after: Mapping | None = None,
+    ) -> list:
+        """Страница выбирается запросом с LIMIT/OFFSET по индексам базы,
+        курсор after превращается в условие на ключ сортировки."""
+        conditions = []
+        params = {}
+        if query:
+            where, params = self.get_find_condition(query)
+            conditions.append(where)
+        if after is not None:
+            params["after_id"] = after["id"]
+            params["after_name"] = after["name"]
+            conditions.append(self.AFTER_CONDITIONS[order_by])
+        return self.select(
+            " AND ".join(conditions),
+            params,
+            self.ORDER_BY_COLUMNS[order_by],
+            limit,
+            offset,
+        )
+
+    def find_by_phone_range(self, key: str, next_key: str) -> list:
+        return self.select(
+            "phone_key >= ? AND phone_key < ?", (key, next_key), "phone_key, id"
+        )
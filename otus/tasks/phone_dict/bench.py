@@ -0,0 +1,230 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+from backends import open_backend
+from hw1 import Contact, PhoneDict
+from loadgen import percentile
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OPERATIONS = 1000
+BOOK_SUFFIXES = {"json": ".json", "sqlite": ".db"}
+LATENCY_PERCENTILES = (50, 90, 99)
+FIRST_NAMES = (
+    "Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Екатерина", "Иван",
+    "Ольга", "Алексей", "Наталья", "Юрий", "Татьяна", "John", "Emma", "Michael",
+    "Olivia", "David", "Sophia", "James", "Isabella", "Ivan", "Natalia",
+)
+LAST_NAMES = (
+    "Иванов", "Смирнова", "Кузнецов", "Попова", "Васильев", "Петрова",
+    "Соколов", "Михайлова", "Новиков", "Фёдорова", "Морозов", "Волкова",
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Petrov", "Sokolova", "Kuznetsov",
+)
+COMMENTS = ("", "", "коллега", "друг", "семья", "work", "gym", "врач", "сосед")
+
+
+def generate_contacts(size: int, seed: int) -> list:
+    """Синтетические контакты с русскими и латинскими именами
+    и номерами телефонов в разной записи"""
+    rnd = random.Random(seed)
+    contacts = []
+    for i in range(size):
+        number = rnd.randrange(10**10)
+        phone = rnd.choice(
+            (
+                f"+7 ({number // 10**7:03d}) {number // 10**4 % 1000:03d}-"
+                f"{number // 100 % 100:02d}-{number % 100:02d}",
+                f"8{number:010d}",
+                f"+1 {number // 10**7:03d} {number // 10**4 % 1000:03d} {number % 10**4:04d}",
+            )
+        )
+        contacts.append(
+            {
+                "id": str(i),
+                "name": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}",
+                "phone": phone,
+                "comment": rnd.choice(COMMENTS),
+            }
+        )
+    return contacts
+
+
+def get_peak_rss_kb() -> int | None:
+    """Пиковый объём резидентной памяти процесса в КБ"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def summarize(latencies: list) -> dict:
+    """Пропускная способность и процентили задержки по замерам операций"""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    summary = {
+        "count": len(latencies),
+        "total_s": round(total, 6),
+        "throughput_ops": round(len(latencies) / total, 1) if total else None,
+    }
+    for rank in LATENCY_PERCENTILES:
+        summary[f"p{rank}_ms"] = round(percentile(latencies, rank) * 1000, 4)
+    summary["max_ms"] = round(latencies[-1] * 1000, 4) if latencies else 0.0
+    return summary
+
+
+def measure(function, args_list) -> dict:
+    """Замер задержки вызова function для каждого набора аргументов"""
+    latencies = []
+    for args in args_list:
+        started = perf_counter()
+        function(*args)
+        latencies.append(perf_counter() - started)
+    return summarize(latencies)
+
+
+def run_case(size: int, backend: str, operations: int, seed: int) -> dict:
+    """Замер операций на справочнике из size контактов. Выполняется
+    в отдельном процессе, чтобы пиковая память относилась только к нему."""
+    rnd = random.Random(seed)
+    operations = min(operations, size)
+    with tempfile.TemporaryDirectory() as directory:
+        file = Path(directory) / f"bench{BOOK_SUFFIXES[backend]}"
+        book = open_backend(file)
+        book.set_contacts_list(generate_contacts(size, seed))
+        book.save(file)
+        book.close()
+        del book
+
+        results = {}
+        started = perf_counter()
+        pd = PhoneDict(file)
+        results["load_file"] = summarize([perf_counter() - started])
+
+        ids = [str(id) for id in rnd.sample(range(size), operations)]
+        results["find_by_id"] = measure(pd.get, [(id,) for id in ids])
+        queries = [
+            (rnd.choice(FIRST_NAMES + LAST_NAMES)[:rnd.randint(3, 6)],)
+            for _ in range(min(operations, 100))
+        ]
+        results["find"] = measure(lambda query: list(pd.iter_find(query)), queries)
+        new_contacts = [
+            Contact(f"new-{i}", contact["name"], contact["phone"], contact["comment"])
+            for i, contact in enumerate(generate_contacts(operations, seed + 1))
+        ]
+        results["append_contact"] = measure(
+            pd.append_contact, [(contact,) for contact in new_contacts]
+        )
+        results["change_by_id"] = measure(
+            lambda id: pd.update(id, comment=f"changed {id}"), [(id,) for id in ids]
+        )
+        results["delete_by_id"] = measure(pd.delete, [(id,) for id in ids])
+
+        started = perf_counter()
+        pd.save_file()
+        results["save_file"] = summarize([perf_counter() - started])
+        pd.backend.close()
+    return {
+        "size": size,
+        "backend": backend,
+        "peak_rss_kb": get_peak_rss_kb(),
+        "operations": results,
+    }
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """Сравнение медианной задержки операций с базовыми результатами.
+    Возвращает список сравнений; регрессией считается рост задержки
+    больше чем в 1 + threshold раз."""
+    baseline_cases = {(case["size"], case["backend"]): case for case in baseline}
+    comparison = []
+    for case in results:
+        base_case = baseline_cases.get((case["size"], case["backend"]))
+        if base_case is None:
+            continue
+        for operation, summary in case["operations"].items():
+            base = base_case["operations"].get(operation)
+            if not base or not base["p50_ms"]:
+                continue
+            ratio = summary["p50_ms"] / base["p50_ms"]
+            comparison.append(
+                {
+                    "size": case["size"],
+                    "backend": case["backend"],
+                    "operation": operation,
+                    "baseline_p50_ms": base["p50_ms"],
+                    "p50_ms": summary["p50_ms"],
+                    "ratio": round(ratio, 3),
+                    "is_regression": ratio > 1 + threshold,
+                }
+            )
+    return comparison
+
+
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Замеры производительности справочника")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="размеры справочников в контактах",
+    )
+    parser.add_argument(
+        "--backends", nargs="+", choices=sorted(BOOK_SUFFIXES), default=["json"],
+        help="типы хранилищ",
+    )
+    parser.add_argument(
+        "--operations", type=int, default=DEFAULT_OPERATIONS,
+        help="число замеров каждой операции",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="файл для результатов в JSON")
+    parser.add_argument("--baseline", type=Path, help="файл базовых результатов для сравнения")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="допустимый рост медианной задержки относительно базовых результатов",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            print(f"Справочник {backend}, контактов: {size}", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(
+                    executor.submit(run_case, size, backend, args.operations, args.seed).result()
+                )
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["comparison"] = compare(results, baseline["results"], args.threshold)
+    data = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        args.output.write_text(data, encoding="utf-8")
+    else:
+        print(data)
+    if any(item["is_regression"] for item in report.get("comparison", [])):
+        sys.exit("Обнаружена регрессия производительности")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from itertools import count
+
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+import asyncio
+import json
+
+
+class PhoneDictClient:
+    """Клиент сервиса поиска контактов (см. server.PhoneDictServer).
+
+    Запросы одного клиента можно выполнять параллельно: ответы
+    сопоставляются с запросами по номеру запроса.
+
+    Пример:
+    client = await PhoneDictClient.connect()
+    contact = await client.get("1")
+    await client.close()
+    """
+
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    pending: dict
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.request_ids = count(1)
+        self.reader_task = asyncio.create_task(self.read_responses())
+
+    @classmethod
+    async def connect(
+        cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = ""
+    ) -> "PhoneDictClient":
+        """Подключение к сервису по TCP или через Unix-сокет"""
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.reader_task.cancel()
+
+    async def read_responses(self):
+        """Чтение ответов сервиса и передача их ожидающим запросам"""
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self.pending.pop(response["id"], None)
+                if future is None or future.done():
+                    continue
+                if response["ok"]:
+                    future.set_result(response["result"])
+                else:
+                    future.set_exception(ValueError(response["error"]))
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Соединение с сервисом закрыто"))
+            self.pending.clear()
+
+    async def request(self, op: str, **params):
+        """Отправка запроса и ожидание ответа"""
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        request = {"id": request_id, "op": op, **params}
+        self.writer.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def get(self, contact_id: str) -> dict | None:
+        return await self.request("get", contact_id=contact_id)
+
+    async def find(self, query: str, limit: int = 100) -> list:
+        return await self.request("find", query=query, limit=limit)
+
+    async def upsert(self, contact: dict) -> dict:
+        return await self.request("upsert", contact=contact)
+
+    async def delete(self, contact_id: str) -> dict:
+        return await self.request("delete", contact_id=contact_id)
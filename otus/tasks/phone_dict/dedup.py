@@ -0,0 +1,93 @@
+from backends import CONTACT_COLUMNS, DEFAULT_COUNTRY_CODE, normalize_phone
+from fuzzy import get_name_key
+
+
+COMMENT_SEPARATOR = "; "
+
+
+def get_name_block_key(name: str | None) -> str:
+    """Ключ блока по имени: ключ нечёткого поиска со словами по алфавиту,
+    чтобы "Иванов Иван" и "Ivan Ivanov" попадали в один блок"""
+    return " ".join(sorted(get_name_key(name or "").split()))
+
+
+def find_root(parents: list, pos: int) -> int:
+    """Корень множества в системе непересекающихся множеств"""
+    while parents[pos] != pos:
+        parents[pos] = parents[parents[pos]]
+        pos = parents[pos]
+    return pos
+
+
+def union(parents: list, a: int, b: int):
+    a, b = find_root(parents, a), find_root(parents, b)
+    if a != b:
+        parents[max(a, b)] = min(a, b)
+
+
+def find_duplicate_groups(contacts, country_code: str = DEFAULT_COUNTRY_CODE) -> list:
+    """Поиск групп контактов-дублей.
+
+    Вместо сравнения всех пар контакты раскладываются по блокам:
+    по нормализованному номеру телефона и по ключу имени. Дублями
+    считаются контакты с одним номером телефона, а также контакты
+    с одинаковым ключом имени, если у них нет разных номеров.
+
+    Аргументы:
+    contacts: перебираемые контакты в порядке следования в справочнике,
+    country_code: код страны для нормализации номеров.
+
+    Возвращает список групп (списков копий контактов) из двух и более
+    контактов, в каждой группе контакты идут в порядке справочника.
+    """
+    contacts = list(contacts)
+    parents = list(range(len(contacts)))
+    phone_blocks = {}
+    name_blocks = {}
+    phone_keys = []
+    for pos, contact in enumerate(contacts):
+        phone_key = normalize_phone(contact.get("phone") or "", country_code)
+        phone_keys.append(phone_key)
+        if phone_key:
+            first = phone_blocks.setdefault(phone_key, pos)
+            union(parents, first, pos)
+        name_key = get_name_block_key(contact.get("name"))
+        if name_key:
+            name_blocks.setdefault(name_key, []).append(pos)
+    for positions in name_blocks.values():
+        if len(positions) < 2:
+            continue
+        phones = {phone_keys[pos] for pos in positions} - {""}
+        if len(phones) <= 1:
+            for pos in positions[1:]:
+                union(parents, positions[0], pos)
+        else:
+            no_phone = [pos for pos in positions if not phone_keys[pos]]
+            for pos in no_phone[1:]:
+                union(parents, no_phone[0], pos)
+    groups = {}
+    for pos in range(len(contacts)):
+        groups.setdefault(find_root(parents, pos), []).append(pos)
+    return [
+        [dict(contacts[pos]) for pos in group]
+        for group in groups.values()
+        if len(group) > 1
+    ]
+
+
+def merge_group(group: list) -> dict:
+    """Поля, которые получит первый контакт группы при объединении:
+    пустые имя и телефон берутся у остальных контактов, различающиеся
+    комментарии объединяются через COMMENT_SEPARATOR."""
+    first = group[0]
+    fields = {}
+    for field in CONTACT_COLUMNS[1:3]:
+        if not first.get(field):
+            fields[field] = next(
+                (contact[field] for contact in group if contact.get(field)), ""
+            )
+    comments = dict.fromkeys(
+        contact["comment"] for contact in group if contact.get("comment")
+    )
+    fields["comment"] = COMMENT_SEPARATOR.join(comments)
+    return fields
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from backends import (
+    BOOK_SUFFIXES,
+    CONTACT_COLUMNS,
+    JsonBackend,
+    get_journal_file,
+    open_backend,
+)
+
+import atexit
+import os
+
+
+# Справочники, разобранные в процессе-исполнителе: путь -> (отметка, хранилище)
+loaded_books = {}
+federated_searches = {}
+
+
+def get_book_stamp(file: Path) -> tuple:
+    """Отметка изменения файла справочника и его журнала"""
+    stamp = []
+    for path in (file, get_journal_file(file)):
+        stat = path.stat() if path.exists() else None
+        stamp.append(stat and (stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def get_book(file: Path):
+    """Хранилище справочника в памяти исполнителя. Справочник разбирается
+    при первом запросе и повторно только после изменения файла."""
+    stamp = get_book_stamp(file)
+    cached = loaded_books.get(file)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    backend = open_backend(file)
+    if isinstance(backend, JsonBackend):
+        backend.materialize()
+    loaded_books[file] = (stamp, backend)
+    return backend
+
+
+def search_book(file: Path, query: str) -> tuple:
+    """Поиск в одном справочнике. Выполняется в процессе-исполнителе."""
+    return file, [dict(contact) for contact in get_book(file).iter_find(query)]
+
+
+def list_books(directory: Path) -> list:
+    """Файлы справочников в директории"""
+    return sorted(
+        file
+        for file in directory.iterdir()
+        if file.is_file() and file.name.lower().endswith(BOOK_SUFFIXES)
+    )
+
+
+class FederatedSearch:
+    """Параллельный поиск по всем справочникам директории.
+
+    Справочники закреплены за процессами-исполнителями: справочник
+    с номером i всегда обрабатывает исполнитель i % max_workers. Поэтому
+    каждый исполнитель держит разобранными только свои справочники,
+    и между запросами они не перечитываются.
+    """
+
+    directory: Path
+    executors: list
+
+    def __init__(self, directory: Path, max_workers: int | None = None):
+        self.directory = directory
+        self.executors = [
+            ProcessPoolExecutor(max_workers=1)
+            for _ in range(max_workers or os.cpu_count() or 1)
+        ]
+
+    def iter_find(self, query: str):
+        """Поиск во всех справочниках. Найденные контакты возвращаются
+        по мере завершения поиска в каждом справочнике, без повторов,
+        с именем файла справочника в поле source."""
+        futures = [
+            self.executors[i % len(self.executors)].submit(search_book, file, query)
+            for i, file in enumerate(list_books(self.directory))
+        ]
+        seen = set()
+        for future in as_completed(futures):
+            file, contacts = future.result()
+            for contact in contacts:
+                key = tuple(contact.get(field) for field in CONTACT_COLUMNS)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield {**contact, "source": file.name}
+
+    def close(self):
+        for executor in self.executors:
+            executor.shutdown(cancel_futures=True)
+
+
+def get_federated_search(directory: Path) -> FederatedSearch:
+    """Общий для всей программы поиск по директории, чтобы исполнители
+    и разобранные ими справочники сохранялись между запросами"""
+    if directory not in federated_searches:
+        federated_searches[directory] = FederatedSearch(directory)
+    return federated_searches[directory]
+
+
+@atexit.register
+def close_federated_searches():
+    for search in federated_searches.values():
+        search.close()
@@ -0,0 +1,145 @@
+import re
+
+
+# Транслитерация кириллицы в латиницу, чтобы "Виталий" и "Vitaliy"
+# приводились к одному ключу
+TRANSLIT_TABLE = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+        "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+        "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+        "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+        "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+        "і": "i", "ї": "yi", "є": "ye", "ґ": "g",
+    }
+)
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def get_name_key(name: str) -> str:
+    """Ключ имени для нечёткого поиска: без учёта регистра, в латинице,
+    слова разделены одним пробелом"""
+    key = name.casefold().translate(TRANSLIT_TABLE)
+    return NON_WORD_RE.sub(" ", key).strip()
+
+
+def get_max_distance(word: str) -> int:
+    """Допустимое по умолчанию число опечаток в слове запроса"""
+    return min(2, len(word) // 4)
+
+
+def get_edit_distance(a: str, b: str) -> int:
+    """Расстояние Левенштейна между строками"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """BK-дерево слов по расстоянию Левенштейна. Каждое слово хранит
+    множество ID контактов, в именах которых оно встречается.
+
+    Поиск слов на расстоянии не больше k от запроса проверяет только
+    поддеревья с расстоянием до родителя в пределах [d - k, d + k],
+    где d - расстояние от запроса до родителя. Слова, у которых не
+    осталось контактов, остаются в дереве как узлы для навигации.
+    Узлы уже известных слов находятся по словарю, без спуска по дереву.
+    """
+
+    root: list | None
+    nodes: dict
+
+    def __init__(self):
+        # Узел: [слово, множество ID, {расстояние: дочерний узел}]
+        self.root = None
+        self.nodes = {}
+
+    def add(self, word: str, id: str):
+        node = self.nodes.get(word)
+        if node is not None:
+            node[1].add(id)
+            return
+        new_node = self.nodes[word] = [word, {id}, {}]
+        if self.root is None:
+            self.root = new_node
+            return
+        node = self.root
+        while True:
+            distance = get_edit_distance(word, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = new_node
+                return
+            node = child
+
+    def discard(self, word: str, id: str):
+        node = self.nodes.get(word)
+        if node is not None:
+            node[1].discard(id)
+
+    def search(self, word: str, max_distance: int):
+        """Перебор пар (расстояние, множество ID) для слов дерева
+        на расстоянии не больше max_distance от word"""
+        stack = [] if self.root is None else [self.root]
+        while stack:
+            node_word, ids, children = stack.pop()
+            distance = get_edit_distance(word, node_word)
+            if distance <= max_distance and ids:
+                yield distance, ids
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+
+
+class FuzzyIndex:
+    """Индекс нечёткого поиска контактов по имени. Каждое слово ключа
+    имени (см. get_name_key) добавляется в BK-дерево."""
+
+    tree: BKTree
+
+    def __init__(self, contacts=()):
+        self.tree = BKTree()
+        for contact in contacts:
+            self.add(contact["id"], contact["name"])
+
+    def add(self, id: str, name: str | None):
+        for word in set(get_name_key(name or "").split()):
+            self.tree.add(word, id)
+
+    def remove(self, id: str, name: str | None):
+        for word in set(get_name_key(name or "").split()):
+            self.tree.discard(word, id)
+
+    def find(self, query: str, max_distance: int | None = None) -> list:
+        """Поиск контактов, в имени которых для каждого слова запроса есть
+        слово с расстоянием не больше max_distance (по умолчанию зависит
+        от длины слова, см. get_max_distance).
+
+        Возвращает список пар (расстояние, ID), отсортированный по сумме
+        расстояний слов запроса до ближайших слов имени.
+        """
+        scores = None
+        for word in get_name_key(query).split():
+            limit = get_max_distance(word) if max_distance is None else max_distance
+            best = {}
+            for distance, ids in self.tree.search(word, limit):
+                for id in ids:
+                    if distance < best.get(id, limit + 1):
+                        best[id] = distance
+            if scores is None:
+                scores = best
+            else:
+                scores = {id: scores[id] + best[id] for id in scores.keys() & best.keys()}
+        return sorted((distance, id) for id, distance in (scores or {}).items())
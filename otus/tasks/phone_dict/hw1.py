@@ -1,15 +1,49 @@
+from collections.abc import Callable
+from functools import partial
 from pathlib import Path
 from typing import get_type_hints
 
+from backends import (
+    BOOK_SUFFIXES,
+    DEFAULT_COUNTRY_CODE,
+    EXCHANGE_SUFFIXES,
+    ORDER_BY_ID,
+    ORDER_BY_NAME,
+    ORDER_BY_POS,
+    SORT_KEYS,
+    JsonBackend,
+    SqliteBackend,
+    get_next_prefix,
+    iter_batches,
+    iter_exchange_contacts,
+    normalize_phone,
+    open_backend,
+    write_exchange_contacts,
+)
+from dedup import find_duplicate_groups, merge_group
+from federated import get_federated_search
+from fuzzy import FuzzyIndex
+from query_cache import QueryCache
+from tui import run_tui
+
+import argparse
 import json
 import os
+import shlex
 import sys
 
 
 CURRENT_DIR = Path(__file__).parent
+PAGE_SIZE = 50
+IMPORT_BATCH_SIZE = 10000
+OUTPUT_BLOCK_SIZE = 500
+TABLE_LINE = "------------------------------------------------------------"
+CLEAR_SCREEN = "\033[H\033[2J"
 
 
 class Contact:
+    __slots__ = ("id", "name", "phone", "comment")
+
     id: str
     name: str
     phone: str
@@ -47,49 +81,72 @@ CONTACT_FIELDS = list(get_type_hints(Contact))
 
 
 class PhoneDict:
+    """Телефонный справочник. Хранение контактов и поиск по ним выполняет
+    хранилище, выбираемое по расширению файла (см. backends.open_backend)."""
+
     json_file: Path
-    json_data: dict
+    backend: JsonBackend | SqliteBackend | None
+    country_code: str
+    journaled: bool
+    binary_snapshot: bool
+    fuzzy_index: FuzzyIndex | None
+    query_cache: QueryCache
     is_json_data_changed: bool
-
-    def __init__(self, json_file: Path):
+    duplicate_handler: Callable | None
+
+    def __init__(
+        self,
+        json_file: Path,
+        country_code: str = DEFAULT_COUNTRY_CODE,
+        journaled: bool = False,
+        binary_snapshot: bool = False,
+        duplicate_handler: Callable | None = None,
+    ):
         self.json_file = json_file
-        self.json_data = {"contacts": []}
+        self.backend = None
+        self.country_code = country_code
+        self.journaled = journaled
+        self.binary_snapshot = binary_snapshot
+        self.fuzzy_index = None
+        self.query_cache = QueryCache()
         self.is_json_data_changed = False
+        self.duplicate_handler = duplicate_handler
         self.load_file(json_file)
 
     def load_file(self, json_file: Path):
         """Чтение файла с диска. При необходимости создание и инициализация.
         
         Аргументы:
-        pd: экземпляр телефонного справочника.
+        json_file: путь к файлу справочника (JSON или база SQLite).
         """
-        if not json_file.exists():
-            with json_file.open("w", encoding="utf-8") as f:
-                json.dump(
-                    self.get_json_data(),
-                    f,
-                    ensure_ascii=False,
-                    indent=4,
-                    sort_keys=True,
-                )
-        with json_file.open(encoding="utf-8") as f:
-             self.json_data = json.load(f)
+        backend = open_backend(
+            json_file, self.country_code, self.journaled, self.binary_snapshot
+        )
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = backend
+        self.fuzzy_index = None
         self.set_json_file(json_file)
         self.set_is_json_data_changed(False)
+        self.check_duplicate_contacts()
+
+    def check_duplicate_contacts(self):
+        """Передача обработчику duplicate_handler контактов с повторными ID,
+        отброшенных при полной загрузке справочника. Большие справочники
+        загружаются полностью только при первом изменении, поэтому проверка
+        выполняется и после открытия файла, и после каждого изменения -
+        до сохранения, при котором такие контакты удаляются."""
+        duplicates = self.backend.duplicate_contacts
+        if duplicates and self.duplicate_handler is not None:
+            self.backend.duplicate_contacts = []
+            self.duplicate_handler(self, duplicates)
 
     def save_file(self, filename: str = ""):
         """Сохранение файла с данными контактов"""
         json_file = self.get_json_file()
         if filename != json_file.name and filename:
-            json_file = CURRENT_DIR / (filename + ".json")
-        with json_file.open("w", encoding="utf-8") as f:
-            json.dump(
-                self.get_json_data(),
-                f,
-                ensure_ascii=False,
-                indent=4,
-                sort_keys=True,
-            )
+            json_file = CURRENT_DIR / (filename + json_file.suffix)
+        self.backend.save(json_file)
         self.set_json_file(json_file)
         self.set_is_json_data_changed(False)
 
@@ -97,10 +154,10 @@ class PhoneDict:
         return self.json_file
     
     def get_json_data(self) -> dict:
-        return self.json_data
+        return {"contacts": self.get_contacts_list()}
 
     def get_contacts_list(self) -> list:
-        return self.json_data["contacts"]
+        return self.backend.get_contacts_list()
 
     def is_data_changed(self) -> bool:
         return self.is_json_data_changed
@@ -108,24 +165,282 @@ class PhoneDict:
     def set_json_file(self, json_file: Path):
         self.json_file = json_file
 
-    def set_json_data(self, json_data: dict):
-        self.json_data["contacts"] = json_data
+    def set_json_data(self, json_data: list):
+        self.backend.set_contacts_list(json_data)
+        self.fuzzy_index = None
         self.set_is_json_data_changed(True)
 
     def append_contact(self, contact: Contact):
-        self.json_data["contacts"].append(contact.to_dict())
+        self.backend.append(contact.to_dict())
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.add(contact.get_id(), contact.get_name())
+        self.set_is_json_data_changed(True)
+
+    def get(self, id: str) -> dict | None:
+        """Поиск контакта по ID. Возвращает None, если контакта нет."""
+        return self.backend.get(id)
+
+    def update(self, id: str, /, **fields) -> dict:
+        """Изменение полей контакта на месте, без смены его позиции.
+
+        Аргументы:
+        id: ID изменяемого контакта,
+        fields: новые значения полей name, phone, comment. ID контакта
+        не меняется: поле id, как и любое другое поле, отличное от
+        CONTACT_FIELDS[1:], приводит к ValueError.
+        """
+        unknown = set(fields) - set(CONTACT_FIELDS[1:])
+        if unknown:
+            raise ValueError(f"Недопустимые поля контакта: {sorted(unknown)}")
+        if self.fuzzy_index is not None and "name" in fields:
+            old_contact = self.backend.get(id)
+            if old_contact is not None:
+                self.fuzzy_index.remove(id, old_contact["name"])
+        contact = self.backend.update(id, fields)
+        if self.fuzzy_index is not None and "name" in fields:
+            self.fuzzy_index.add(id, contact["name"])
         self.set_is_json_data_changed(True)
+        return contact
+
+    def delete(self, id: str) -> dict:
+        """Удаление контакта по ID. Возвращает удалённый контакт."""
+        contact = self.backend.delete(id)
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.remove(id, contact["name"])
+        self.set_is_json_data_changed(True)
+        return contact
+
+    def iter_contacts(self):
+        """Перебор контактов для операций только чтения. Большие JSON-файлы
+        при этом разбираются потоком, без загрузки в память целиком."""
+        return self.backend.iter_contacts()
+
+    def iter_find(self, query: str):
+        """Поиск контактов по точному совпадению ID или вхождению строки
+        в имя, телефон или комментарий. Найденные контакты возвращаются
+        по одному в порядке их следования в справочнике.
+        """
+        if not query:
+            return iter(())
+        return self.backend.iter_find(query)
+
+    def find(self, query: str) -> list:
+        """Список контактов, найденных методом iter_find. Результат
+        запоминается в кэше запросов."""
+        return self.query_cache.get(("find", query), lambda: self.iter_find(query))
+
+    def get_fuzzy_index(self) -> FuzzyIndex:
+        """Индекс нечёткого поиска по именам. Строится при первом обращении
+        и дальше обновляется при изменении контактов."""
+        if self.fuzzy_index is None:
+            self.fuzzy_index = FuzzyIndex(self.iter_contacts())
+        return self.fuzzy_index
+
+    def find_fuzzy(self, query: str, max_distance: int | None = None) -> list:
+        """Нечёткий поиск контактов по имени: без учёта регистра и алфавита
+        (кириллица сравнивается с латиницей в транслитерации), с опечатками.
+
+        Аргументы:
+        query: имя или его часть, одно или несколько слов,
+        max_distance: допустимое число опечаток в каждом слове запроса,
+        по умолчанию зависит от длины слова.
+
+        Возвращает список пар (число опечаток, контакт), начиная с самых
+        близких к запросу.
+        """
+        return self.query_cache.get(
+            ("fuzzy", query, max_distance),
+            lambda: [
+                (distance, self.get(id))
+                for distance, id in self.get_fuzzy_index().find(query, max_distance)
+            ],
+        )
+
+    def get_page(
+        self,
+        limit: int = PAGE_SIZE,
+        offset: int = 0,
+        order_by: str = ORDER_BY_POS,
+        query: str = "",
+        after=None,
+    ) -> list:
+        """Страница контактов.
+
+        Аргументы:
+        limit: размер страницы,
+        offset: число пропускаемых контактов,
+        order_by: порядок: ORDER_BY_POS (как в файле), ORDER_BY_ID
+        или ORDER_BY_NAME,
+        query: строка поиска как в iter_find, пустая - все контакты,
+        after: последний контакт предыдущей страницы (курсор). С курсором
+        следующая страница не требует пропуска уже показанных контактов.
+
+        Страницы запоминаются в кэше запросов.
+        """
+        if order_by != ORDER_BY_POS and order_by not in SORT_KEYS:
+            raise ValueError(f"Неизвестный порядок сортировки: {order_by}")
+        after_key = None if after is None else (after["id"], after["name"])
+        return self.query_cache.get(
+            ("page", query, order_by, limit, offset, after_key),
+            lambda: self.backend.get_page(query, order_by, limit, offset, after),
+        )
+
+    def iter_pages(
+        self,
+        limit: int = PAGE_SIZE,
+        order_by: str = ORDER_BY_POS,
+        query: str = "",
+    ):
+        """Ленивый перебор страниц: каждая следующая страница выбирается
+        по курсору только при обращении к ней."""
+        after = None
+        while True:
+            page = self.get_page(limit, order_by=order_by, query=query, after=after)
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+            after = page[-1]
+
+    def import_contacts(self, file: Path, batch_size: int = IMPORT_BATCH_SIZE) -> tuple:
+        """Пакетный импорт контактов из файла CSV или JSON Lines.
+
+        Файл читается потоком, пакетами по batch_size контактов. Строки,
+        не являющиеся контактами, контакты без ID и с ID, уже встречавшимися
+        в справочнике или в файле, пропускаются. Индексы обновляются один
+        раз на пакет, и после каждого пакета справочник отмечается
+        изменённым: если чтение файла прервётся ошибкой (ValueError, например
+        из-за неверной кодировки), уже добавленные контакты не потеряются.
+        Возвращает число импортированных и пропущенных контактов.
+        """
+        imported = skipped = 0
+        for batch in iter_batches(iter_exchange_contacts(file), batch_size):
+            unique_contacts = {}
+            for contact in batch:
+                if contact is None or not contact["id"] or contact["id"] in unique_contacts:
+                    skipped += 1
+                    continue
+                unique_contacts[contact["id"]] = contact
+            existing_ids = self.backend.get_existing_ids(unique_contacts)
+            new_contacts = [
+                contact
+                for id, contact in unique_contacts.items()
+                if id not in existing_ids
+            ]
+            skipped += len(existing_ids)
+            self.backend.append_many(new_contacts)
+            if self.fuzzy_index is not None:
+                for contact in new_contacts:
+                    self.fuzzy_index.add(contact["id"], contact["name"])
+            imported += len(new_contacts)
+            if new_contacts:
+                self.set_is_json_data_changed(True)
+        return imported, skipped
+
+    def find_duplicates(self) -> list:
+        """Группы контактов-дублей: с одним нормализованным номером
+        телефона или с одинаковым именем без разных номеров
+        (см. dedup.find_duplicate_groups)."""
+        return find_duplicate_groups(self.iter_contacts(), self.country_code)
+
+    def merge_duplicates(self, groups: list | None = None) -> int:
+        """Объединение каждой группы дублей в её первый контакт: комментарии
+        объединяются, пустые поля заполняются из остальных контактов,
+        остальные контакты удаляются. Справочник не сохраняется, чтобы
+        результат записывался одним сохранением.
+
+        Контакты заменяются целиком одним списком, поэтому индексы
+        перестраиваются один раз, а не на каждый удалённый контакт.
+
+        Аргументы:
+        groups: группы из find_duplicates, по умолчанию ищутся заново.
+
+        Возвращает число удалённых контактов.
+        """
+        if groups is None:
+            groups = self.find_duplicates()
+        merged = {}
+        removed_ids = set()
+        for group in groups:
+            merged[group[0]["id"]] = {**group[0], **merge_group(group)}
+            removed_ids.update(contact["id"] for contact in group[1:])
+        if not merged:
+            return 0
+        self.set_json_data(
+            [
+                merged.get(contact["id"]) or dict(contact)
+                for contact in self.iter_contacts()
+                if contact["id"] not in removed_ids
+            ]
+        )
+        return len(removed_ids)
+
+    def export_contacts(self, file: Path) -> int:
+        """Потоковый экспорт контактов в файл CSV или JSON Lines.
+        Возвращает число выгруженных контактов."""
+        return write_exchange_contacts(file, self.iter_contacts())
+
+    def find_by_phone(self, phone: str) -> list:
+        """Поиск контактов с тем же нормализованным номером телефона"""
+        key = normalize_phone(phone, self.country_code)
+        if not key:
+            return []
+        return self.query_cache.get(
+            ("phone", key),
+            lambda: self.backend.find_by_phone_range(key, key + "\0"),
+        )
+
+    def find_by_phone_prefix(self, prefix: str) -> list:
+        """Поиск контактов, нормализованный номер которых начинается с prefix.
+        Контакты возвращаются в порядке возрастания номеров.
+        """
+        key = normalize_phone(prefix, self.country_code)
+        if not key:
+            return []
+        return self.query_cache.get(
+            ("phone_prefix", key),
+            lambda: self.backend.find_by_phone_range(key, get_next_prefix(key)),
+        )
 
     def set_is_json_data_changed(self, is_json_data_changed: bool):
+        """Отметка об изменении данных. Вызывается после каждого изменения
+        контактов, открытия и сохранения файла, поэтому здесь же
+        увеличивается поколение данных кэша запросов."""
         self.is_json_data_changed = is_json_data_changed
+        self.query_cache.invalidate()
+        if is_json_data_changed:
+            self.check_duplicate_contacts()
 
 
 def clear_console():
-    """Очистка консоли для отрисовки нового интерфейса"""
+    """Очистка консоли для отрисовки нового интерфейса. В Unix-подобных
+    системах экран очищается управляющей последовательностью терминала,
+    без запуска внешней команды."""
     if os.name == "nt":  # Windows
         _ = os.system("cls")
-    else:  # Unix-like systems (Linux/MacOS)
-        _ = os.system("clear")
+    elif sys.stdout.isatty():  # Unix-like systems (Linux/MacOS)
+        sys.stdout.write(CLEAR_SCREEN)
+        sys.stdout.flush()
+
+
+def report_duplicate_contacts(pd: PhoneDict, duplicates: list, output=None):
+    """Сообщение о контактах с повторными ID, не загруженных из файла.
+    Вне диалогового режима выводится в sys.stderr, чтобы не смешиваться
+    с выводом команд."""
+    output = output or sys.stdout
+    print(
+        f"В файле {pd.get_json_file().name} есть контакты с повторными ID, "
+        f"загружен первый контакт с каждым ID. Не загружено: {len(duplicates)}, "
+        "при сохранении они будут удалены:",
+        file=output,
+    )
+    print_contact_table(duplicates, output=output)
+
+
+def confirm_duplicate_contacts(pd: PhoneDict, duplicates: list):
+    """Сообщение о контактах с повторными ID в диалоговом режиме"""
+    report_duplicate_contacts(pd, duplicates)
+    input("Нажмите <Enter>")
 
 
 def open_file(pd: PhoneDict):
@@ -133,7 +448,7 @@ def open_file(pd: PhoneDict):
     dict_files = {}
     i = 1
     for file in CURRENT_DIR.iterdir():
-        if file.is_file() and file.name.lower().endswith(".json"):
+        if file.is_file() and file.name.lower().endswith(BOOK_SUFFIXES):
             print(f"{i}. {file.name}")
             dict_files[str(i)] = file.name
             i += 1
@@ -158,26 +473,60 @@ def save_file(pd: PhoneDict):
         pd.save_file(cmd)
 
 
-def print_contact_table(contact_list: list):
-    """Вывод таблицы с контактами"""
-    print("------------------------------------------------------------")
-    print(
-        f"|{str.upper(CONTACT_FIELDS[0])}\t|{str.upper(CONTACT_FIELDS[1])}\t"
-        f"|{str.upper(CONTACT_FIELDS[2])}\t|{str.upper(CONTACT_FIELDS[3])}"
-    )
-    print("------------------------------------------------------------")
-    for value in contact_list:
-        contact = Contact(**value)
-        print(
-            f"|{contact.get_id()}\t|{contact.get_name()}\t|{contact.get_phone()}\t|"
-            f"{contact.get_comment()}"
+def print_contact_table(contact_list, fields: list = CONTACT_FIELDS, output=None) -> int:
+    """Вывод таблицы с контактами. Строки выводятся блоками по
+    OUTPUT_BLOCK_SIZE по мере перебора contact_list, поэтому подходит
+    и генератор. Возвращает число строк.
+
+    Аргументы:
+    contact_list: перебираемые контакты,
+    fields: выводимые поля контактов,
+    output: файл для вывода, по умолчанию sys.stdout.
+    """
+    output = output or sys.stdout
+    lines = [
+        TABLE_LINE,
+        "|" + "\t|".join(str.upper(field) for field in fields),
+        TABLE_LINE,
+    ]
+    count = 0
+    for contact in contact_list:
+        lines.append("|" + "\t|".join(str(contact[field]) for field in fields))
+        count += 1
+        if len(lines) >= OUTPUT_BLOCK_SIZE:
+            output.write("\n".join(lines) + "\n")
+            lines = []
+    lines.append(TABLE_LINE)
+    output.write("\n".join(lines) + "\n")
+    return count
+
+
+def show_pages(pages) -> tuple:
+    """Постраничный вывод таблиц контактов с переходом на следующую
+    страницу по <Enter>. Возвращает число показанных контактов и признак
+    того, что были показаны все страницы."""
+    count = 0
+    page = next(pages, [])
+    while True:
+        count += print_contact_table(page)
+        page = next(pages, None)
+        if page is None:
+            return count, True
+        cmd = input(
+            f"Показано контактов: {count}. Следующая страница - <Enter>. "
+            "Прекратить просмотр - <0>: "
         )
-    print("------------------------------------------------------------")
+        if cmd == "0":
+            return count, False
 
 
 def show_all_contacts(pd: PhoneDict):
     """Меню отображения всех контактов в файле"""
-    print_contact_table(pd.get_contacts_list())
+    cmd = input(
+        "Порядок вывода: как в файле - <Enter>, по ID - <1>, по имени - <2>: "
+    )
+    order_by = {"1": ORDER_BY_ID, "2": ORDER_BY_NAME}.get(cmd, ORDER_BY_POS)
+    show_pages(pd.iter_pages(order_by=order_by))
     input(f"\nВсе контакты из файла {pd.get_json_file()}")
 
 
@@ -191,6 +540,9 @@ def create_contact(pd: PhoneDict):
         if not id:
             print("Поле ID должно быть обязательно заполнено!")
             continue
+        if pd.get(id) is not None:
+            print(f"Контакт с ID {id} уже существует!")
+            continue
         not_correct_id_flag = False
     name = input("Введите имя: ")
     phone = input("Введите номер телефона: ")
@@ -202,50 +554,64 @@ def create_contact(pd: PhoneDict):
 
 def find_contact(pd: PhoneDict):
     """Меню поиска контакта"""
-    matched_contacts = list()
     cmd = input("Введите значение для поиска по полям: ")
-    if cmd:
-        for contact in pd.get_contacts_list():
-            if (
-                contact.get("id") == cmd
-                or cmd in contact.get("name")
-                or cmd in contact.get("phone")
-                or cmd in contact.get("comment")
-            ):
-                matched_contacts.append(contact)
+    pages = pd.iter_pages(query=cmd) if cmd else iter(())
+    count, is_complete = show_pages(pages)
+    if is_complete:
+        input(f"\n\nПо вашему запросу найдено {count} стр.")
+
+
+def find_contact_by_phone(pd: PhoneDict):
+    """Меню поиска контакта по номеру телефона или его началу"""
+    cmd = input("Введите номер телефона или его начало: ")
+    matched_contacts = pd.find_by_phone_prefix(cmd)
     print_contact_table(matched_contacts)
     input(f"\n\nПо вашему запросу найдено {len(matched_contacts)} стр.")
 
 
+def find_contact_fuzzy(pd: PhoneDict):
+    """Меню нечёткого поиска контакта по имени"""
+    cmd = input("Введите имя для поиска с учётом опечаток и транслитерации: ")
+    matches = pd.find_fuzzy(cmd) if cmd else []
+    print_contact_table(
+        ({**contact, "distance": distance} for distance, contact in matches),
+        CONTACT_FIELDS + ["distance"],
+    )
+    input(f"\n\nПо вашему запросу найдено {len(matches)} стр.")
+
+
+def find_contact_in_all_books(pd: PhoneDict):
+    """Меню поиска контакта во всех справочниках текущей директории.
+    Результаты выводятся по мере завершения поиска в каждом справочнике."""
+    cmd = input("Введите значение для поиска по полям во всех справочниках: ")
+    contacts = get_federated_search(CURRENT_DIR).iter_find(cmd) if cmd else iter(())
+    count = print_contact_table(contacts, CONTACT_FIELDS + ["source"])
+    input(f"\n\nПо вашему запросу найдено {count} стр.")
+
+
 def change_contact(pd: PhoneDict):
     """Редактирование контакта    
 
     Аргументы:
     pd: экземпляр телефонного справочника."""
-    json_data = pd.get_contacts_list()
-    print_contact_table(json_data)
+    show_pages(pd.iter_pages())
     cmd = input("\nВведите ID изменяемого контакта: ")
     if cmd:
-        fixed_contact = ""
-        for contact in json_data:
-            if contact.get("id") == cmd:
-                json_data.remove(contact)
-                fixed_contact = contact
-                name = input("Введите имя: ")
-                phone = input("Введите номер телефона: ")
-                comment = input("Введите комментарий: ")
-                contact = Contact(
-                    cmd,
-                    name if name else contact.get("name"),
-                    phone if phone else contact.get("phone"),
-                    comment if comment else contact.get("comment"),
-                )
-                json_data.append(contact.to_dict())
-                break
-
-        if fixed_contact:
-            pd.set_json_data(json_data)
-            input(f"\nКонтакт {fixed_contact} был обновлён!")
+        contact = pd.get(cmd)
+        if contact is None:
+            input(f"\nКонтакт с ID {cmd} не найден!")
+            return
+        fixed_contact = dict(contact)
+        name = input("Введите имя: ")
+        phone = input("Введите номер телефона: ")
+        comment = input("Введите комментарий: ")
+        pd.update(
+            cmd,
+            name=name if name else contact.get("name"),
+            phone=phone if phone else contact.get("phone"),
+            comment=comment if comment else contact.get("comment"),
+        )
+        input(f"\nКонтакт {fixed_contact} был обновлён!")
 
 
 def delete_contact(pd: PhoneDict):
@@ -253,19 +619,79 @@ def delete_contact(pd: PhoneDict):
     
     Аргументы:
     pd: экземпляр телефонного справочника."""
-    print_contact_table(pd.get_contacts_list())
+    show_pages(pd.iter_pages())
     cmd = input("\nВведите ID удаляемого контакта: ")
     if cmd:
-        contacts = pd.get_contacts_list()
-        removed_contact = ""
-        for contact in contacts:
-            if contact.get("id") == cmd:
-                contacts.remove(contact)
-                removed_contact = contact
-                break
-        if removed_contact:
-            pd.set_json_data(contacts)
-            input(f"\nКонтакт {removed_contact} был удалён!")
+        if pd.get(cmd) is None:
+            input(f"\nКонтакт с ID {cmd} не найден!")
+            return
+        removed_contact = pd.delete(cmd)
+        input(f"\nКонтакт {removed_contact} был удалён!")
+
+
+def import_export_contacts(pd: PhoneDict):
+    """Меню импорта и экспорта контактов в файлы CSV и JSON Lines"""
+    cmd = input(
+        "Импорт контактов из файла - <1>, экспорт контактов в файл - <2>.\n"
+        "Выход в главное меню - <0>: "
+    )
+    if cmd not in ("1", "2"):
+        return
+    filename = input(
+        f"Введите имя файла с расширением {' или '.join(EXCHANGE_SUFFIXES)}: "
+    )
+    file = CURRENT_DIR / filename
+    if file.suffix.lower() not in EXCHANGE_SUFFIXES:
+        input("Неподдерживаемый формат файла. Нажмите <Enter>")
+        return
+    if cmd == "1":
+        if not file.exists():
+            input(f"Файл {filename} не найден. Нажмите <Enter>")
+            return
+        try:
+            imported, skipped = pd.import_contacts(file)
+        except ValueError as error:
+            input(f"Ошибка чтения файла {filename}: {error}. Нажмите <Enter>")
+            return
+        input(f"Импортировано контактов: {imported}, пропущено: {skipped}")
+    else:
+        count = pd.export_contacts(file)
+        input(f"Выгружено контактов: {count} в файл {filename}")
+
+
+def merge_duplicate_contacts(pd: PhoneDict):
+    """Меню поиска и объединения дублей контактов"""
+    groups = pd.find_duplicates()
+    print_contact_table(
+        (
+            {**contact, "group": number}
+            for number, group in enumerate(groups, 1)
+            for contact in group
+        ),
+        ["group"] + CONTACT_FIELDS,
+    )
+    if not groups:
+        input("\n\nДубли контактов не найдены. Нажмите <Enter>")
+        return
+    cmd = input(
+        f"\n\nНайдено групп дублей: {len(groups)}. Объединить каждую группу "
+        "в первый контакт и сохранить файл? (Y/N, Y - по умолчанию) "
+    )
+    if cmd.upper() == "Y" or not cmd:
+        removed = pd.merge_duplicates(groups)
+        pd.save_file()
+        input(f"Удалено контактов: {removed}. Файл сохранён. Нажмите <Enter>")
+
+
+def show_query_cache_stats(pd: PhoneDict):
+    """Вывод статистики кэша запросов"""
+    stats = pd.query_cache.get_stats()
+    print(f"Попаданий в кэш: {stats['hits']}")
+    print(f"Промахов: {stats['misses']}")
+    print(f"Доля попаданий: {stats['hit_ratio']:.1%}")
+    print(f"Записей в кэше: {stats['size']} из {stats['maxsize']}")
+    print(f"Поколение данных: {stats['generation']}")
+    input("\nНажмите <Enter>")
 
 
 def exit_(pd: PhoneDict):
@@ -315,9 +741,199 @@ def exec_method(cmd: str, pd: PhoneDict):
         input("Ваша команда не распознана. Нажмите <Enter> и повторите ввод")
 
 
+def parse_batch_fields(params: list) -> dict:
+    """Разбор аргументов вида поле=значение команды пакетного режима"""
+    fields = {}
+    for param in params:
+        field, sep, value = param.partition("=")
+        if not sep or field not in CONTACT_FIELDS:
+            raise ValueError(f"ожидается поле=значение, где поле из {CONTACT_FIELDS}: {param}")
+        fields[field] = value
+    return fields
+
+
+def print_batch_contacts(contacts):
+    """Вывод контактов пакетного режима: по одному JSON-объекту в строке"""
+    sys.stdout.writelines(
+        json.dumps(dict(contact), ensure_ascii=False) + "\n" for contact in contacts
+    )
+
+
+def batch_add(pd: PhoneDict, params: list):
+    """add id=ID [name=...] [phone=...] [comment=...]"""
+    fields = parse_batch_fields(params)
+    if not fields.get("id"):
+        raise ValueError("поле id должно быть обязательно заполнено")
+    pd.append_contact(Contact(**{field: fields.get(field, "") for field in CONTACT_FIELDS}))
+
+
+def batch_update(pd: PhoneDict, params: list):
+    """update ID [name=...] [phone=...] [comment=...]"""
+    if not params:
+        raise ValueError("не указан ID контакта")
+    id, *assignments = params
+    if pd.get(id) is None:
+        raise ValueError(f"контакт с ID {id} не найден")
+    pd.update(id, **parse_batch_fields(assignments))
+
+
+def batch_delete(pd: PhoneDict, params: list):
+    """delete ID [ID ...]"""
+    for id in params:
+        if pd.get(id) is None:
+            raise ValueError(f"контакт с ID {id} не найден")
+        pd.delete(id)
+
+
+def batch_get(pd: PhoneDict, params: list):
+    """get ID [ID ...]"""
+    print_batch_contacts(
+        contact for contact in map(pd.get, params) if contact is not None
+    )
+
+
+def batch_find(pd: PhoneDict, params: list):
+    """find СТРОКА"""
+    print_batch_contacts(pd.iter_find(" ".join(params)))
+
+
+def batch_save(pd: PhoneDict, params: list) -> str:
+    """save [ИМЯ_ФАЙЛА] - имя файла для сохранения в конце пакета"""
+    return params[0] if params else ""
+
+
+BATCH_COMMANDS = {
+    "add": batch_add,
+    "update": batch_update,
+    "delete": batch_delete,
+    "get": batch_get,
+    "find": batch_find,
+    "save": batch_save,
+}
+
+
+def run_batch(pd: PhoneDict, lines) -> None:
+    """Выполнение команд пакетного режима без диалогов и очистки экрана.
+
+    Команды применяются как одна транзакция: при ошибке выбрасывается
+    ValueError с номером строки, и справочник не сохраняется. После
+    успешного выполнения всех команд справочник сохраняется один раз.
+
+    Аргументы:
+    pd: экземпляр телефонного справочника,
+    lines: строки с командами из BATCH_COMMANDS. Аргументы разделяются
+    пробелами, значения с пробелами берутся в кавычки, # - комментарий.
+    """
+    filename = ""
+    for number, line in enumerate(lines, 1):
+        try:
+            args = shlex.split(line, comments=True)
+            if not args:
+                continue
+            command, *params = args
+            if command not in BATCH_COMMANDS:
+                raise ValueError(f"неизвестная команда {command}")
+            result = BATCH_COMMANDS[command](pd, params)
+        except ValueError as error:
+            raise ValueError(f"Строка {number}: {error}") from error
+        if command == "save":
+            filename = result
+    if pd.is_data_changed() or filename:
+        pd.save_file(filename)
+
+
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Телефонный справочник")
+    parser.add_argument(
+        "--book",
+        type=Path,
+        default=CURRENT_DIR / "phone_dict.json",
+        help="файл справочника (JSON или база SQLite)",
+    )
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="сохранять изменения в журнал рядом с файлом вместо перезаписи файла",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="сохранять рядом с JSON-файлом двоичный снимок для быстрого открытия",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    import_parser = subparsers.add_parser(
+        "import", help="импортировать контакты из файла CSV или JSON Lines"
+    )
+    import_parser.add_argument("file", type=Path)
+    export_parser = subparsers.add_parser(
+        "export", help="выгрузить контакты в файл CSV или JSON Lines"
+    )
+    export_parser.add_argument("file", type=Path)
+    subparsers.add_parser(
+        "dedup", help="объединить дубли контактов и сохранить справочник"
+    )
+    subparsers.add_parser(
+        "tui", help="полноэкранный просмотр и поиск контактов по мере ввода"
+    )
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="выполнить команды add, update, delete, get, find, save из файла",
+    )
+    batch_parser.add_argument(
+        "file",
+        type=argparse.FileType("r", encoding="utf-8"),
+        nargs="?",
+        default=sys.stdin,
+        help="файл с командами, по умолчанию стандартный ввод",
+    )
+    return parser.parse_args(argv)
+
+
 def main():
     """Точка входа в программу."""
-    pd = PhoneDict(CURRENT_DIR / "phone_dict.json")
+    args = parse_args()
+    if args.command is None:
+        duplicate_handler = confirm_duplicate_contacts
+    else:
+        duplicate_handler = partial(report_duplicate_contacts, output=sys.stderr)
+    pd = PhoneDict(
+        args.book,
+        journaled=args.journal,
+        binary_snapshot=args.snapshot,
+        duplicate_handler=duplicate_handler,
+    )
+    if args.command == "import":
+        try:
+            imported, skipped = pd.import_contacts(args.file)
+        except ValueError as error:
+            sys.exit(f"Ошибка чтения файла {args.file}: {error}. Изменения не сохранены")
+        pd.save_file()
+        print(f"Импортировано контактов: {imported}, пропущено: {skipped}")
+        return
+    if args.command == "export":
+        count = pd.export_contacts(args.file)
+        print(f"Выгружено контактов: {count}")
+        return
+    if args.command == "tui":
+        try:
+            run_tui(pd)
+        except RuntimeError as error:
+            sys.exit(f"Ошибка: {error}")
+        return
+    if args.command == "dedup":
+        groups = pd.find_duplicates()
+        removed = pd.merge_duplicates(groups)
+        if removed:
+            pd.save_file()
+        print(f"Групп дублей: {len(groups)}, удалено контактов: {removed}")
+        return
+    if args.command == "batch":
+        try:
+            run_batch(pd, args.file)
+        except ValueError as error:
+            sys.exit(f"Ошибка: {error}. Изменения не сохранены")
+        return
     while cmd := show_main_menu(pd):
         exec_method(cmd, pd)
 
@@ -329,6 +945,15 @@ CREATE_CONTACT_TP = ("Создать контакт", create_contact)
 FIND_CONTACT_TP = ("Найти контакт", find_contact)
 CHANGE_CONTACT_TP = ("Изменить контакт", change_contact)
 DELETE_CONTACT_TP = ("Удалить контакт", delete_contact)
+FIND_CONTACT_BY_PHONE_TP = ("Найти контакт по номеру телефона", find_contact_by_phone)
+IMPORT_EXPORT_TP = ("Импорт и экспорт контактов", import_export_contacts)
+FIND_CONTACT_IN_ALL_BOOKS_TP = (
+    "Найти контакт во всех справочниках",
+    find_contact_in_all_books,
+)
+FIND_CONTACT_FUZZY_TP = ("Нечёткий поиск контакта по имени", find_contact_fuzzy)
+MERGE_DUPLICATES_TP = ("Объединить дубли контактов", merge_duplicate_contacts)
+QUERY_CACHE_STATS_TP = ("Статистика кэша запросов", show_query_cache_stats)
 EXIT_TP = ("Выход из программы", exit_)
 
 MENU_METHOD_MAP = {
@@ -339,6 +964,12 @@ MENU_METHOD_MAP = {
     "5": FIND_CONTACT_TP,
     "6": CHANGE_CONTACT_TP,
     "7": DELETE_CONTACT_TP,
+    "8": FIND_CONTACT_BY_PHONE_TP,
+    "9": IMPORT_EXPORT_TP,
+    "10": FIND_CONTACT_IN_ALL_BOOKS_TP,
+    "11": FIND_CONTACT_FUZZY_TP,
+    "12": MERGE_DUPLICATES_TP,
+    "13": QUERY_CACHE_STATS_TP,
     "0": EXIT_TP,
 }
 
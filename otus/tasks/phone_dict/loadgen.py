@@ -0,0 +1,76 @@
+from time import perf_counter
+
+from client import PhoneDictClient
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+import argparse
+import asyncio
+import random
+
+
+def percentile(values: list, rank: float) -> float:
+    """Процентиль отсортированного списка значений"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * rank / 100))]
+
+
+async def run_client(args: argparse.Namespace, client_number: int, latencies: list):
+    """Один клиент: args.requests запросов подряд, доля изменений args.writes"""
+    client = await PhoneDictClient.connect(args.host, args.port, args.unix)
+    rnd = random.Random(client_number)
+    try:
+        for i in range(args.requests):
+            started = perf_counter()
+            if rnd.random() < args.writes:
+                await client.upsert(
+                    {
+                        "id": f"load-{client_number}-{i % 100}",
+                        "name": f"Нагрузка {client_number}",
+                        "phone": str(rnd.randrange(10**9)),
+                        "comment": "loadgen",
+                    }
+                )
+            elif rnd.random() < 0.5:
+                await client.get(str(rnd.randrange(args.id_range)))
+            else:
+                await client.find(rnd.choice(args.queries), limit=args.limit)
+            latencies.append(perf_counter() - started)
+    finally:
+        await client.close()
+
+
+async def run(args: argparse.Namespace):
+    latencies = []
+    started = perf_counter()
+    await asyncio.gather(
+        *(run_client(args, number, latencies) for number in range(args.clients))
+    )
+    elapsed = perf_counter() - started
+    latencies.sort()
+    print(f"Запросов: {len(latencies)} за {elapsed:.2f} с")
+    print(f"Запросов в секунду: {len(latencies) / elapsed:.0f}")
+    print(f"Задержка p50: {percentile(latencies, 50) * 1000:.2f} мс")
+    print(f"Задержка p99: {percentile(latencies, 99) * 1000:.2f} мс")
+
+
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервиса контактов")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default="")
+    parser.add_argument("--clients", type=int, default=50, help="число клиентов")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на клиента")
+    parser.add_argument("--writes", type=float, default=0.05, help="доля изменений")
+    parser.add_argument("--id-range", type=int, default=1000, help="диапазон ID для get")
+    parser.add_argument("--limit", type=int, default=20, help="размер ответа find")
+    parser.add_argument(
+        "--queries", nargs="+", default=["Ив", "Tan", "915", "comment"],
+        help="строки для find",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+
+QUERY_CACHE_SIZE = 256
+
+
+class QueryCache:
+    """Ограниченный LRU-кэш результатов запросов к справочнику.
+
+    Каждый результат запоминается вместе с поколением данных. Любое
+    изменение справочника увеличивает поколение (метод invalidate), после
+    чего все ранее сохранённые результаты считаются устаревшими и при
+    обращении вычисляются заново. Устаревшие записи не удаляются сразу,
+    а вытесняются по мере заполнения кэша.
+    """
+
+    maxsize: int
+    entries: OrderedDict
+    generation: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self.generation += 1
+
+    def get(self, key: tuple, compute) -> list:
+        """Результат запроса key из кэша или, при промахе, вычисленный
+        функцией compute. Возвращается копия списка результатов."""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == self.generation:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+        self.misses += 1
+        result = list(compute())
+        self.entries[key] = (self.generation, result)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return list(result)
+
+    def get_stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "generation": self.generation,
+        }
@@ -0,0 +1,224 @@
+from functools import partial
+from pathlib import Path
+
+from backends import JsonBackend
+from hw1 import CONTACT_FIELDS, CURRENT_DIR, Contact, PhoneDict, report_duplicate_contacts
+
+import argparse
+import asyncio
+import json
+import sys
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+FIND_LIMIT = 100
+COMMIT_DELAY = 0.002
+READ_OPS = ("get", "find")
+WRITE_OPS = ("upsert", "delete")
+
+
+def check_contact(contact) -> dict:
+    """Проверка контакта из запроса до любых изменений справочника:
+    JSON-объект с полями из CONTACT_FIELDS и строковыми значениями"""
+    if not isinstance(contact, dict):
+        raise ValueError("Контакт должен быть JSON-объектом")
+    unknown = set(contact) - set(CONTACT_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные поля контакта: {', '.join(sorted(unknown))}")
+    for field, value in contact.items():
+        if not isinstance(value, str):
+            raise ValueError(f"Значение поля {field} должно быть строкой")
+    return contact
+
+
+class PhoneDictServer:
+    """Сервис поиска контактов поверх PhoneDict.
+
+    Протокол: каждая строка запроса и ответа - JSON-объект. Запрос:
+    {"id": <номер запроса>, "op": "get"|"find"|"upsert"|"delete", ...},
+    ответ: {"id": <номер запроса>, "ok": true, "result": ...} или
+    {"id": <номер запроса>, "ok": false, "error": "..."}.
+
+    Запросы чтения выполняются сразу по мере поступления от любого числа
+    клиентов. Изменения ставятся в очередь единственной задачи записи,
+    которая применяет накопившиеся изменения пачкой и сохраняет справочник
+    один раз на пачку (групповая фиксация). Клиент получает ответ на
+    изменение после сохранения.
+    """
+
+    pd: PhoneDict
+    commit_delay: float
+    write_queue: asyncio.Queue
+
+    def __init__(self, pd: PhoneDict, commit_delay: float = COMMIT_DELAY):
+        self.pd = pd
+        self.commit_delay = commit_delay
+        self.write_queue = asyncio.Queue()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обработка соединения клиента. Запросы одного клиента могут
+        выполняться параллельно, ответы сопоставляются по полю id."""
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.handle_line(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Запрос должен быть JSON-объектом")
+            request_id = request.get("id")
+            result = await self.execute(request)
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as error:
+            response = {"id": request_id, "ok": False, "error": str(error)}
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def execute(self, request: dict):
+        op = request.get("op")
+        if op in READ_OPS:
+            return self.read(request)
+        if op in WRITE_OPS:
+            future = asyncio.get_running_loop().create_future()
+            await self.write_queue.put((request, future))
+            return await future
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    def read(self, request: dict):
+        if request["op"] == "get":
+            contact = self.pd.get(request["contact_id"])
+            return None if contact is None else dict(contact)
+        contacts = self.pd.get_page(
+            limit=int(request.get("limit", FIND_LIMIT)), query=request["query"]
+        )
+        return [dict(contact) for contact in contacts]
+
+    def write(self, request: dict):
+        """Применение одного изменения. Вызывается только задачей записи."""
+        if request["op"] == "delete":
+            contact_id = request["contact_id"]
+            if not isinstance(contact_id, str):
+                raise ValueError("ID контакта должен быть строкой")
+            if self.pd.get(contact_id) is None:
+                raise ValueError(f"Контакт с ID {contact_id} не найден")
+            return dict(self.pd.delete(contact_id))
+        contact = check_contact(request["contact"])
+        contact_id = contact.get("id")
+        if not contact_id:
+            raise ValueError("Поле ID должно быть обязательно заполнено")
+        fields = {field: value for field, value in contact.items() if field != "id"}
+        if self.pd.get(contact_id) is None:
+            self.pd.append_contact(
+                Contact(**{field: contact.get(field, "") for field in CONTACT_FIELDS})
+            )
+        else:
+            self.pd.update(contact_id, **fields)
+        return dict(self.pd.get(contact_id))
+
+    async def save(self):
+        """Сохранение справочника. JSON-файл записывается в отдельном
+        потоке, а цикл событий тем временем продолжает обслуживать запросы
+        чтения: пока идёт сохранение, задача записи не применяет новых
+        изменений. Соединение SQLite работает только в создавшем его
+        потоке, поэтому база фиксируется в цикле событий."""
+        if isinstance(self.pd.backend, JsonBackend):
+            await asyncio.to_thread(self.pd.save_file)
+        else:
+            self.pd.save_file()
+
+    async def run_writer(self):
+        """Единственная задача записи с групповой фиксацией изменений"""
+        while True:
+            batch = [await self.write_queue.get()]
+            await asyncio.sleep(self.commit_delay)
+            while not self.write_queue.empty():
+                batch.append(self.write_queue.get_nowait())
+            results = []
+            for request, future in batch:
+                try:
+                    results.append((future, self.write(request)))
+                except Exception as error:
+                    # Ошибка одного изменения не должна останавливать задачу записи
+                    future.set_exception(error)
+            try:
+                if self.pd.is_data_changed():
+                    await self.save()
+            except OSError as error:
+                for future, _ in results:
+                    future.set_exception(
+                        ValueError(f"Ошибка сохранения справочника: {error}")
+                    )
+                continue
+            for future, result in results:
+                future.set_result(result)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = ""):
+        """Запуск сервиса на TCP-порту или на Unix-сокете"""
+        writer_task = asyncio.create_task(self.run_writer())
+        if unix:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Справочник {self.pd.get_json_file()} доступен по адресу {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+
+def load_book(pd: PhoneDict):
+    """Полная загрузка JSON-справочника и построение индекса поиска до
+    запуска сервиса. Иначе большой справочник разбирался бы потоком,
+    а индекс строился при первом поиске прямо в цикле событий."""
+    if isinstance(pd.backend, JsonBackend):
+        pd.backend.materialize()
+        pd.backend.get_ngram_index()
+        pd.check_duplicate_contacts()
+
+
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Сервис поиска контактов")
+    parser.add_argument("--book", type=Path, default=CURRENT_DIR / "phone_dict.json")
+    parser.add_argument("--journal", action="store_true")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default="", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument(
+        "--commit-delay",
+        type=float,
+        default=COMMIT_DELAY,
+        help="время накопления изменений перед сохранением, в секундах",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    pd = PhoneDict(
+        args.book,
+        journaled=args.journal,
+        duplicate_handler=partial(report_duplicate_contacts, output=sys.stderr),
+    )
+    load_book(pd)
+    server = PhoneDictServer(pd, args.commit_delay)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Сервис остановлен")
+
+
+if __name__ == "__main__":
+    main()
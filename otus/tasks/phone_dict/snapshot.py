@@ -0,0 +1,244 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from pathlib import Path
+
+import mmap
+import os
+import struct
+import sys
+
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_MAGIC = b"PHDSNAP1"
+# Заголовок: сигнатура, число контактов, время изменения и размер
+# JSON-файла, по которому построен снимок, код страны индекса телефонов
+SNAPSHOT_HEADER = struct.Struct("<8sQqQ8s")
+SNAPSHOT_FIELDS = ("id", "name", "phone", "comment", "phone_key")
+CONTACT_FIELD_NUMBERS = {"id": 0, "name": 1, "phone": 2, "comment": 3}
+SEARCH_FIELD_NUMBERS = (1, 2, 3)
+PHONE_KEY_NUMBER = 4
+# Таблицы пишутся в порядке байтов платформы, поэтому снимок
+# поддерживается только на little-endian платформах
+IS_SNAPSHOT_SUPPORTED = sys.byteorder == "little"
+
+
+def get_snapshot_file(json_file: Path) -> Path:
+    """Путь к двоичному снимку, хранящемуся рядом с JSON-файлом справочника"""
+    return json_file.with_name(json_file.name + SNAPSHOT_SUFFIX)
+
+
+def get_padding(size: int) -> bytes:
+    """Дополнение таблицы до границы 8 байт"""
+    return bytes(-size % 8)
+
+
+def write_binary_snapshot(json_file: Path, rows: list, country_code: str):
+    """Атомарная запись двоичного снимка справочника.
+
+    Аргументы:
+    json_file: JSON-файл справочника, уже записанный на диск,
+    rows: кортежи значений полей SNAPSHOT_FIELDS в порядке контактов,
+    country_code: код страны, с которым нормализованы номера телефонов.
+
+    Формат: заголовок SNAPSHOT_HEADER, таблица смещений строк (Q на каждое
+    поле каждого контакта и одно завершающее), признаки пустых значений
+    (байт на поле), порядок контактов по ID и порядок по номерам телефонов
+    (I на контакт), затем куча строк в UTF-8.
+    """
+    if not IS_SNAPSHOT_SUPPORTED:
+        return
+    heap = bytearray()
+    offsets = array("Q", [0])
+    nulls = bytearray()
+    for row in rows:
+        for value in row:
+            nulls.append(value is None)
+            if value is not None:
+                heap += value.encode("utf-8")
+            offsets.append(len(heap))
+    ids = [row[0] or "" for row in rows]
+    id_order = array("I", sorted(range(len(rows)), key=ids.__getitem__))
+    phone_order = array(
+        "I",
+        sorted(range(len(rows)), key=lambda pos: (rows[pos][PHONE_KEY_NUMBER] or "", ids[pos])),
+    )
+    stat = json_file.stat()
+    snapshot_file = get_snapshot_file(json_file)
+    tmp_file = snapshot_file.with_name(snapshot_file.name + ".tmp")
+    with tmp_file.open("wb") as f:
+        f.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC,
+                len(rows),
+                stat.st_mtime_ns,
+                stat.st_size,
+                country_code.encode("ascii"),
+            )
+        )
+        for table in (offsets.tobytes(), nulls, id_order.tobytes(), phone_order.tobytes()):
+            f.write(table)
+            f.write(get_padding(len(table)))
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, snapshot_file)
+
+
+def open_snapshot(json_file: Path, country_code: str):
+    """Открытие двоичного снимка JSON-файла. Возвращает None, если снимка
+    нет, он повреждён или устарел: JSON-файл изменён после записи снимка
+    или номера телефонов нормализованы с другим кодом страны."""
+    snapshot_file = get_snapshot_file(json_file)
+    if not IS_SNAPSHOT_SUPPORTED or not snapshot_file.exists():
+        return None
+    try:
+        snapshot = BinarySnapshot(snapshot_file)
+    except (OSError, ValueError, struct.error):
+        return None
+    stat = json_file.stat()
+    if snapshot.source_stamp != (stat.st_mtime_ns, stat.st_size) or (
+        snapshot.country_code != country_code
+    ):
+        snapshot.close()
+        return None
+    return snapshot
+
+
+class SnapshotView(Mapping):
+    """Контакт двоичного снимка. Поля декодируются из кучи строк при
+    обращении. Представление действительно, пока снимок открыт."""
+
+    __slots__ = ("snapshot", "pos")
+
+    def __init__(self, snapshot: "BinarySnapshot", pos: int):
+        self.snapshot = snapshot
+        self.pos = pos
+
+    def __getitem__(self, field: str) -> str | None:
+        return self.snapshot.get_value(self.pos, CONTACT_FIELD_NUMBERS[field])
+
+    def __iter__(self):
+        return iter(CONTACT_FIELD_NUMBERS)
+
+    def __len__(self) -> int:
+        return len(CONTACT_FIELD_NUMBERS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class BinarySnapshot:
+    """Двоичный снимок справочника, отображённый в память через mmap.
+
+    Открытие снимка не зависит от числа контактов: таблицы читаются прямо
+    из отображения, контакты декодируются при обращении. Поиск по ID
+    и по началу номера телефона выполняется двоичным поиском по готовым
+    таблицам порядка, поиск подстроки - поиском байтов UTF-8 в куче строк.
+    """
+
+    count: int
+    source_stamp: tuple
+    country_code: str
+
+    def __init__(self, file: Path):
+        with file.open("rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.map_tables()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def map_tables(self):
+        magic, count, mtime_ns, size, country_code = SNAPSHOT_HEADER.unpack_from(self.mmap)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Файл не является снимком справочника")
+        self.count = count
+        self.source_stamp = (mtime_ns, size)
+        self.country_code = country_code.rstrip(b"\0").decode("ascii")
+        self.buffer = memoryview(self.mmap)
+        slot_count = count * len(SNAPSHOT_FIELDS)
+        start = SNAPSHOT_HEADER.size
+        tables = []
+        for item_size, length, typecode in (
+            (8, slot_count + 1, "Q"),
+            (1, slot_count, "B"),
+            (4, count, "I"),
+            (4, count, "I"),
+        ):
+            end = start + item_size * length
+            if end > len(self.buffer):
+                raise ValueError("Снимок справочника оборван")
+            tables.append(self.buffer[start:end].cast(typecode))
+            start = end + len(get_padding(end - start))
+        self.offsets, self.nulls, self.id_order, self.phone_order = tables
+        self.heap_start = start
+        if start + self.offsets[-1] > len(self.buffer):
+            raise ValueError("Снимок справочника оборван")
+
+    def close(self):
+        for name in ("offsets", "nulls", "id_order", "phone_order", "buffer"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.mmap.close()
+
+    def get_bytes(self, pos: int, field_number: int) -> memoryview:
+        slot = pos * len(SNAPSHOT_FIELDS) + field_number
+        start = self.heap_start
+        return self.buffer[start + self.offsets[slot]:start + self.offsets[slot + 1]]
+
+    def get_value(self, pos: int, field_number: int) -> str | None:
+        if self.nulls[pos * len(SNAPSHOT_FIELDS) + field_number]:
+            return None
+        return str(self.get_bytes(pos, field_number), "utf-8")
+
+    def iter_views(self, start: int = 0):
+        return (SnapshotView(self, pos) for pos in range(start, self.count))
+
+    def get_pos(self, id: str) -> int | None:
+        """Позиция контакта по ID: двоичный поиск по таблице порядка ID.
+        Порядок байтов UTF-8 совпадает с порядком строк."""
+        key = id.encode("utf-8")
+        i = bisect_left(self.id_order, key, key=lambda pos: bytes(self.get_bytes(pos, 0)))
+        if i < self.count and self.get_bytes(self.id_order[i], 0) == key:
+            return self.id_order[i]
+        return None
+
+    def get(self, id: str) -> SnapshotView | None:
+        pos = self.get_pos(id)
+        return None if pos is None else SnapshotView(self, pos)
+
+    def find_by_phone_range(self, key: str, next_key: str) -> list:
+        """Контакты с нормализованным номером в диапазоне [key, next_key)"""
+
+        def get_phone_key(pos: int) -> bytes:
+            return bytes(self.get_bytes(pos, PHONE_KEY_NUMBER))
+
+        lo = bisect_left(self.phone_order, key.encode("utf-8"), key=get_phone_key)
+        hi = bisect_left(self.phone_order, next_key.encode("utf-8"), key=get_phone_key)
+        return [SnapshotView(self, pos) for pos in self.phone_order[lo:hi]]
+
+    def iter_find(self, query: str):
+        """Контакты, у которых ID равен query или query входит в имя,
+        телефон или комментарий. Вхождения ищутся в куче строк целиком,
+        после вхождения поиск продолжается со следующего поля."""
+        if not query:
+            return self.iter_views()
+        needle = query.encode("utf-8")
+        positions = set()
+        heap_start = self.heap_start
+        field_count = len(SNAPSHOT_FIELDS)
+        start = 0
+        while (found := self.mmap.find(needle, heap_start + start)) != -1:
+            offset = found - heap_start
+            slot = bisect_right(self.offsets, offset) - 1
+            field_end = self.offsets[slot + 1]
+            if slot % field_count in SEARCH_FIELD_NUMBERS and offset + len(needle) <= field_end:
+                positions.add(slot // field_count)
+            start = field_end
+        pos = self.get_pos(query)
+        if pos is not None:
+            positions.add(pos)
+        return (SnapshotView(self, pos) for pos in sorted(positions))
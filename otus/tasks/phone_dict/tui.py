@@ -0,0 +1,179 @@
+from itertools import islice
+
+import locale
+
+try:
+    import curses
+except ImportError:  # Windows без пакета windows-curses
+    curses = None
+
+
+ID_WIDTH = 10
+NAME_WIDTH = 30
+PHONE_WIDTH = 20
+ESC_DELAY = 25
+ESC = "\x1b"
+BACKSPACE_KEYS = ("\b", "\x7f")
+HELP_LINE = "Ввод - поиск, стрелки/PgUp/PgDn/Home/End - прокрутка, Esc - выход"
+
+
+class VirtualList:
+    """Лениво заполняемый список строк таблицы. Контакты берутся
+    из итератора только по мере прокрутки, поэтому открытие списка
+    не зависит от размера справочника."""
+
+    rows: list
+    is_complete: bool
+
+    def __init__(self, contacts):
+        self.iterator = iter(contacts)
+        self.rows = []
+        self.is_complete = False
+
+    def fetch(self, count: int):
+        """Дочитывание списка до count строк, если контакты ещё остались"""
+        if self.is_complete or len(self.rows) >= count:
+            return
+        self.rows.extend(islice(self.iterator, count - len(self.rows)))
+        if len(self.rows) < count:
+            self.is_complete = True
+
+    def fetch_all(self):
+        if not self.is_complete:
+            self.rows.extend(self.iterator)
+            self.is_complete = True
+
+    def get_window(self, top: int, height: int) -> list:
+        """Видимое окно строк. Читается на одну строку больше, чтобы знать,
+        есть ли строки ниже окна."""
+        self.fetch(top + height + 1)
+        return self.rows[top:top + height]
+
+
+def format_row(contact, width: int) -> str:
+    """Строка таблицы шириной не больше width символов"""
+    values = [str(contact[field] or "") for field in ("id", "name", "phone", "comment")]
+    line = (
+        f"{values[0]:<{ID_WIDTH}.{ID_WIDTH}} {values[1]:<{NAME_WIDTH}.{NAME_WIDTH}} "
+        f"{values[2]:<{PHONE_WIDTH}.{PHONE_WIDTH}} {values[3]}"
+    )
+    return line[:width]
+
+
+class ContactBrowser:
+    """Полноэкранный просмотр и поиск контактов на curses.
+
+    На экран выводится только видимое окно списка контактов. При каждом
+    нажатии клавиши экран перерисовывается в буфере curses, а на терминал
+    отправляются только изменившиеся символы. Поиск выполняется по мере
+    ввода через PhoneDict.iter_find; если клавиши нажимаются быстрее, чем
+    выполняется поиск, все накопившиеся нажатия применяются за один поиск.
+    """
+
+    query: str
+    top: int
+    selected: int
+    contacts: VirtualList
+
+    def __init__(self, stdscr, pd):
+        self.stdscr = stdscr
+        self.pd = pd
+        self.query = ""
+        self.search()
+
+    def search(self):
+        contacts = self.pd.iter_find(self.query) if self.query else self.pd.iter_contacts()
+        self.contacts = VirtualList(contacts)
+        self.top = 0
+        self.selected = 0
+
+    def get_list_height(self) -> int:
+        height, _ = self.stdscr.getmaxyx()
+        return max(1, height - 4)
+
+    def draw(self):
+        stdscr = self.stdscr
+        height, width = stdscr.getmaxyx()
+        list_height = self.get_list_height()
+        window = self.contacts.get_window(self.top, list_height)
+        count = f"{len(self.contacts.rows)}{'' if self.contacts.is_complete else '+'}"
+        stdscr.erase()
+        stdscr.addnstr(
+            0, 0, f"Справочник {self.pd.get_json_file().name}, найдено: {count}", width - 1
+        )
+        header = format_row(
+            {"id": "ID", "name": "NAME", "phone": "PHONE", "comment": "COMMENT"}, width - 1
+        )
+        stdscr.addnstr(1, 0, header.ljust(width - 1), width - 1, curses.A_REVERSE)
+        for i, contact in enumerate(window):
+            attr = curses.A_STANDOUT if self.top + i == self.selected else curses.A_NORMAL
+            stdscr.addnstr(2 + i, 0, format_row(contact, width - 1), width - 1, attr)
+        if height > 3:
+            stdscr.addnstr(height - 2, 0, HELP_LINE, width - 1, curses.A_DIM)
+        prompt = f"Поиск: {self.query}"
+        stdscr.addnstr(height - 1, 0, prompt, width - 1)
+        stdscr.move(height - 1, min(len(prompt), width - 1))
+        stdscr.refresh()
+
+    def move_selection(self, delta: int):
+        list_height = self.get_list_height()
+        self.contacts.fetch(self.selected + delta + 1)
+        last = len(self.contacts.rows) - 1
+        self.selected = max(0, min(self.selected + delta, last))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + list_height:
+            self.top = self.selected - list_height + 1
+
+    def handle_key(self, key) -> bool:
+        """Обработка клавиши. Возвращает True, если изменилась строка поиска."""
+        list_height = self.get_list_height()
+        if key == curses.KEY_UP:
+            self.move_selection(-1)
+        elif key == curses.KEY_DOWN:
+            self.move_selection(1)
+        elif key == curses.KEY_PPAGE:
+            self.move_selection(-list_height)
+        elif key == curses.KEY_NPAGE:
+            self.move_selection(list_height)
+        elif key == curses.KEY_HOME:
+            self.move_selection(-self.selected)
+        elif key == curses.KEY_END:
+            self.contacts.fetch_all()
+            self.move_selection(len(self.contacts.rows))
+        elif key == curses.KEY_BACKSPACE or key in BACKSPACE_KEYS:
+            self.query = self.query[:-1]
+            return True
+        elif isinstance(key, str) and key.isprintable():
+            self.query += key
+            return True
+        return False
+
+    def run(self):
+        curses.set_escdelay(ESC_DELAY)
+        while True:
+            self.draw()
+            keys = [self.stdscr.get_wch()]
+            self.stdscr.nodelay(True)
+            try:
+                while True:
+                    keys.append(self.stdscr.get_wch())
+            except curses.error:
+                pass
+            finally:
+                self.stdscr.nodelay(False)
+            is_query_changed = False
+            for key in keys:
+                if key == ESC:
+                    return
+                is_query_changed |= self.handle_key(key)
+            if is_query_changed:
+                self.search()
+
+
+def run_tui(pd):
+    """Запуск полноэкранного режима просмотра и поиска контактов"""
+    if curses is None:
+        raise RuntimeError("Для полноэкранного режима нужен модуль curses")
+    locale.setlocale(locale.LC_ALL, "")
+    curses.wrapper(lambda stdscr: ContactBrowser(stdscr, pd).run())